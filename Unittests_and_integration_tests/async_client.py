@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""An asyncio github org client
+"""
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import (
+    Dict,
+    Iterable,
+    List,
+)
+
+from requests import Session
+
+from client import GithubOrgClient
+from utils import (
+    get_json,
+    async_memoize,
+)
+
+
+class AsyncGithubOrgClient:
+    """An asyncio Github org client
+    Requests go through `utils.get_json` on `executor` (the loop's
+    default executor when None), so many orgs can be fetched at once;
+    pass a `session` (e.g. a utils.PooledSession) to reuse connections.
+    """
+    ORG_URL = GithubOrgClient.ORG_URL
+
+    def __init__(self, org_name: str, executor: Executor = None,
+                 session: Session = None) -> None:
+        """Init method of AsyncGithubOrgClient"""
+        self._org_name = org_name
+        self._executor = executor
+        self._session = session
+
+    async def _get_json(self, url: str) -> Dict:
+        """Run get_json without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(get_json, url, session=self._session))
+
+    @async_memoize
+    async def org(self) -> Dict:
+        """Memoize org"""
+        return await self._get_json(self.ORG_URL.format(org=self._org_name))
+
+    @async_memoize
+    async def repos_payload(self) -> Dict:
+        """Memoize repos payload"""
+        org = await self.org
+        return await self._get_json(org["repos_url"])
+
+    async def public_repos(self, license: str = None) -> List[str]:
+        """Public repos"""
+        json_payload = await self.repos_payload
+        return [
+            repo["name"] for repo in json_payload
+            if license is None or GithubOrgClient.has_license(repo, license)
+        ]
+
+    def cancel(self) -> None:
+        """Cancel the memoized fetches still in flight"""
+        for task_name in ("_org_task", "_repos_payload_task"):
+            task = getattr(self, task_name, None)
+            if task is not None:
+                task.cancel()
+
+    @classmethod
+    async def public_repos_many(cls, orgs: Iterable[str],
+                                license: str = None,
+                                concurrency: int = 10,
+                                session: Session = None
+                                ) -> Dict[str, List[str]]:
+        """Public repos of every org, with at most `concurrency` orgs
+        being fetched at any time
+        When one org fails, the other fetches are cancelled and the error
+        is raised at once: requests already running are left to finish on
+        their threads instead of stalling the event loop."""
+        semaphore = asyncio.Semaphore(concurrency)
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        clients = {org: cls(org, executor, session) for org in orgs}
+
+        async def fetch(client: "AsyncGithubOrgClient") -> List[str]:
+            """Public repos of one org"""
+            async with semaphore:
+                return await client.public_repos(license)
+
+        tasks = [asyncio.ensure_future(fetch(client))
+                 for client in clients.values()]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            for client in clients.values():
+                client.cancel()
+            executor.shutdown(wait=False)
+        return dict(zip(clients, results))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Benchmarks for GithubOrgClient.
+
+    ./bench_client.py memory [count]
+    ./bench_client.py load [clients] [threads] [latency_ms] [per_page]
+
+`load` drives the whole client (HTTP, JSON, pagination) against a local
+FixtureServer, so it needs no network.
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Callable,
+    Iterator,
+)
+from unittest.mock import patch
+
+from client import GithubOrgClient
+from fixture_server import FixtureServer
+from fixtures import TEST_PAYLOAD
+from utils import PooledSession
+
+
+def decoded_repos(count: int) -> Iterator[dict]:
+    """`count` freshly decoded copies of the fixture repos, one at a time"""
+    encoded = [json.dumps(repo) for repo in TEST_PAYLOAD[0][1]]
+    for position in range(count):
+        yield json.loads(encoded[position % len(encoded)])
+
+
+def retained(build: Callable[[], object]) -> int:
+    """Bytes still allocated by what `build` returns"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def memory(count: int = 100000) -> None:
+    """Compare full repo dicts with projected records"""
+    with patch.object(GithubOrgClient, "iter_repos",
+                      lambda self, incremental=False: decoded_repos(count)):
+        runs = (
+            ("full dicts", lambda: list(decoded_repos(count))),
+            ("projected", lambda: GithubOrgClient(
+                "google").projected_repos()),
+        )
+        print("{} repos".format(count))
+        print("{:<12}{:>12}{:>12}".format("storage", "MiB", "B/repo"))
+        for label, build in runs:
+            size = retained(build)
+            print("{:<12}{:>12.1f}{:>12.0f}".format(
+                label, size / 2 ** 20, size / count))
+
+
+def load(clients: int = 200, threads: int = 8, latency_ms: int = 5,
+         per_page: int = 3) -> None:
+    """End-to-end public_repos throughput against a local server"""
+    with FixtureServer(per_page=per_page,
+                       latency=latency_ms / 1000) as server, \
+            patch.object(GithubOrgClient, "ORG_URL",
+                         server.url + "/orgs/{org}"):
+        print("{} clients, {} threads, {} ms latency, {} repos/page".format(
+            clients, threads, latency_ms, per_page))
+        print("{:<12}{:>12}{:>14}".format("transport", "clients/s",
+                                          "requests/s"))
+        for label, session in (("requests.get", None),
+                               ("pooled", PooledSession(threads))):
+            def run(_: int) -> list:
+                """One full client flow"""
+                return GithubOrgClient("google", session).public_repos(
+                    license="apache-2.0", stream=True)
+
+            server.hits.clear()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(threads) as executor:
+                list(executor.map(run, range(clients)))
+            elapsed = time.perf_counter() - start
+            print("{:<12}{:>12.1f}{:>14.1f}".format(
+                label, clients / elapsed,
+                sum(server.hits.values()) / elapsed))
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "memory"
+    {"memory": memory, "load": load}[command](*map(int, sys.argv[2:]))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for utils, run against a local fixture server.
+
+    ./bench_utils.py pool
+    ./bench_utils.py access
+"""
+import statistics
+import sys
+import time
+from typing import (
+    Callable,
+    List,
+)
+
+from fixture_server import FixtureServer
+from fixtures import TEST_PAYLOAD
+from utils import (
+    access_nested_map,
+    compile_path,
+    get_json,
+    pluck,
+    PooledSession,
+)
+
+
+def timed_calls(call: Callable[[], object], count: int) -> List[float]:
+    """Per-call latencies of `count` calls, in milliseconds"""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: List[float]) -> None:
+    """Print mean, median and p99 of `latencies`"""
+    ordered = sorted(latencies)
+    print("{:<12}{:>10.3f}{:>10.3f}{:>10.3f}".format(
+        label, statistics.mean(ordered), statistics.median(ordered),
+        ordered[int(len(ordered) * 0.99) - 1]))
+
+
+def pool(count: int = 500) -> None:
+    """Compare get_json with and without a pooled session"""
+    with FixtureServer() as server:
+        url = server.url + "/orgs/google"
+        print("{:<12}{:>10}{:>10}{:>10}".format(
+            "transport", "mean ms", "p50 ms", "p99 ms"))
+        report("requests.get", timed_calls(lambda: get_json(url), count))
+        with PooledSession() as session:
+            report("pooled", timed_calls(
+                lambda: get_json(url, session=session), count))
+
+
+def access(copies: int = 20000, rounds: int = 5) -> None:
+    """Compare access_nested_map with compiled and batch accessors"""
+    records = TEST_PAYLOAD[0][1] * copies
+    path = ("license", "key")
+    get_key = compile_path(path)
+
+    def nested() -> List:
+        """The current per-call function"""
+        keys = []
+        for record in records:
+            try:
+                keys.append(access_nested_map(record, path))
+            except KeyError:
+                keys.append(None)
+        return keys
+
+    def compiled() -> List:
+        """A compiled getter, called per record"""
+        keys = []
+        for record in records:
+            try:
+                keys.append(get_key(record))
+            except KeyError:
+                keys.append(None)
+        return keys
+
+    def batch() -> List:
+        """One pluck over the whole list"""
+        return pluck(records, path, default=None)
+
+    print("{} records".format(len(records)))
+    print("{:<20}{:>12}".format("accessor", "ns/record"))
+    for label, call in (("access_nested_map", nested),
+                        ("compile_path", compiled), ("pluck", batch)):
+        best = min(timed_calls(call, rounds))
+        print("{:<20}{:>12.1f}".format(label, best * 1e6 / len(records)))
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "pool"
+    {"pool": pool, "access": access}[command]()
@@ -1,31 +1,82 @@
 #!/usr/bin/env python3
 """A github org client
 """
+import heapq
+from collections import namedtuple
+from functools import lru_cache
 from typing import (
+    FrozenSet,
     List,
     Dict,
+    Iterable,
+    Iterator,
+    Sequence,
+    Tuple,
+    Union,
 )
 
+from requests import Session
+
 from utils import (
     get_json,
+    iter_json_items,
+    iter_json_pages,
     access_nested_map,
+    compile_path,
     memoize,
+    pluck,
 )
 
+_get_license_key = compile_path(("license", "key"))
+
+
+class NoLicense:
+    """Type of GithubOrgClient.NO_LICENSE, the key of unlicensed repos
+    """
+
+    def __repr__(self) -> str:
+        """repr of NO_LICENSE"""
+        return "NO_LICENSE"
+
+
+LicenseKey = Union[str, NoLicense]
+# a license key, GithubOrgClient.NO_LICENSE, or an iterable of them
+Licenses = Union[LicenseKey, Iterable[LicenseKey]]
+
+
+@lru_cache(maxsize=None)
+def repo_record(fields: Tuple[str, ...]) -> type:
+    """Compact record class (a namedtuple) for dotted repo `fields`,
+    e.g. ("name", "license.key") gives fields name and license_key"""
+    return namedtuple("RepoRecord",
+                      [field.replace(".", "_") for field in fields],
+                      rename=True)
+
 
 class GithubOrgClient:
     """A Githib org client
     """
     ORG_URL = "https://api.github.com/orgs/{org}"
+    NO_LICENSE = NoLicense()
+    PUBLIC_FIELDS = ("name", "license.key")
 
-    def __init__(self, org_name: str) -> None:
-        """Init method of GithubOrgClient"""
+    def __init__(self, org_name: str, session: Session = None,
+                 fields: Sequence[str] = None) -> None:
+        """Init method of GithubOrgClient
+        With `fields` (dotted paths), repos_payload keeps only those
+        fields, plus name and license.key, as repo_record tuples; the
+        repos themselves are the same as without `fields`."""
         self._org_name = org_name
+        self._session = session
+        self._license_index_of = None
+        self._fields = None if fields is None else tuple(
+            dict.fromkeys(self.PUBLIC_FIELDS + tuple(fields)))
 
     @memoize
     def org(self) -> Dict:
         """Memoize org"""
-        return get_json(self.ORG_URL.format(org=self._org_name))
+        return get_json(self.ORG_URL.format(org=self._org_name),
+                        session=self._session)
 
     @property
     def _public_repos_url(self) -> str:
@@ -33,19 +84,122 @@ class GithubOrgClient:
         return self.org["repos_url"]
 
     @memoize
-    def repos_payload(self) -> Dict:
-        """Memoize repos payload"""
-        return get_json(self._public_repos_url)
+    def repos_payload(self) -> List:
+        """Memoize repos payload
+        A projected client fetches the same payload and keeps records."""
+        json_payload = get_json(self._public_repos_url, session=self._session)
+        if self._fields is None:
+            return json_payload
+        return self._project(json_payload, self._fields)
+
+    def iter_repos(self, incremental: bool = False) -> Iterator[Dict]:
+        """Stream repos page by page, prefetching the next page
+        With `incremental`, each page is instead parsed as it downloads,
+        holding a single repo in memory at a time."""
+        if incremental:
+            yield from iter_json_items(self._public_repos_url,
+                                       session=self._session)
+            return
+        for page in iter_json_pages(self._public_repos_url,
+                                    session=self._session):
+            yield from page
+
+    def iter_public_repos(self, license: Licenses = None,
+                          incremental: bool = True) -> Iterator[str]:
+        """Lazily filtered public repo names, across every page"""
+        wanted = None if license is None else self._license_keys(license)
+        for repo in self.iter_repos(incremental):
+            if wanted is None or self.license_key(repo) in wanted:
+                yield repo["name"]
 
-    def public_repos(self, license: str = None) -> List[str]:
-        """Public repos"""
+    def projected_repos(self, fields: Sequence[str] = PUBLIC_FIELDS
+                        ) -> List[Tuple]:
+        """Repos reduced to the dotted `fields`, as repo_record tuples
+        Missing fields are None. Repos are parsed one at a time, so the
+        full payload is never held in memory, and nothing is memoized."""
+        return self._project(self.iter_repos(incremental=True), fields)
+
+    @staticmethod
+    def _project(repos: Iterable[Dict], fields: Sequence[str]) -> List[Tuple]:
+        """Reduce `repos` to repo_record tuples of the dotted `fields`"""
+        fields = tuple(fields)
+        record = repo_record(fields)
+        paths = [field.split(".") for field in fields]
+        values = pluck(repos, *paths, default=None)
+        if len(paths) == 1:
+            return [record(value) for value in values]
+        return [record._make(value) for value in values]
+
+    def refresh(self) -> None:
+        """Forget the memoized payloads and the license index"""
+        for attr_name in ("_org", "_repos_payload"):
+            self.__dict__.pop(attr_name, None)
+        self._license_index_of = None
+
+    def _indexed_payload(self
+                         ) -> Tuple[Dict[LicenseKey, List[int]], List[str]]:
+        """Positions of the repos of each license key in repos_payload,
+        and the repo names, rebuilt only when the payload changes"""
         json_payload = self.repos_payload
-        public_repos = [
-            repo["name"] for repo in json_payload
-            if license is None or self.has_license(repo, license)
-        ]
+        cached = self._license_index_of
+        if cached is None or cached[0] is not json_payload:
+            index = {}
+            for position, key in enumerate(self._payload_license_keys()):
+                index.setdefault(key, []).append(position)
+            if self._fields is None:
+                names = [repo["name"] for repo in json_payload]
+            else:
+                names = [repo.name for repo in json_payload]
+            cached = self._license_index_of = (json_payload, index, names)
+        return cached[1], cached[2]
+
+    @property
+    def _license_index(self) -> Dict[LicenseKey, List[int]]:
+        """Positions of the repos of each license key in repos_payload"""
+        return self._indexed_payload()[0]
 
-        return public_repos
+    def public_repos(self, license: Licenses = None,
+                     stream: bool = False) -> List[str]:
+        """Public repos
+        `license` is a license key, NO_LICENSE, or an iterable of them.
+        With `stream`, every page is parsed and filtered as it arrives,
+        in bounded memory, instead of using the memoized first-page
+        payload."""
+        if stream:
+            return list(self.iter_public_repos(license))
+        index, names = self._indexed_payload()
+        if license is None:
+            return list(names)
+
+        keys = self._license_keys(license)
+        if len(keys) == 1:
+            positions = index.get(next(iter(keys)), [])
+        else:
+            positions = heapq.merge(*(index.get(key, []) for key in keys))
+        return [names[position] for position in positions]
+
+    def _payload_license_keys(self) -> List[LicenseKey]:
+        """License key, or NO_LICENSE, of every repo in repos_payload"""
+        if self._fields is None:
+            return [self.license_key(repo) for repo in self.repos_payload]
+        return [self.NO_LICENSE if repo.license_key is None
+                else repo.license_key for repo in self.repos_payload]
+
+    @classmethod
+    def _license_keys(cls, license: Licenses) -> FrozenSet[LicenseKey]:
+        """Normalize a license query to a set of keys"""
+        if isinstance(license, str) or license is cls.NO_LICENSE:
+            return frozenset((license,))
+        return frozenset(license)
+
+    @classmethod
+    def license_key(cls, repo: Dict[str, Dict]) -> LicenseKey:
+        """License key of `repo`, or NO_LICENSE"""
+        try:
+            key = _get_license_key(repo)
+        except KeyError:
+            return cls.NO_LICENSE
+        return cls.NO_LICENSE if key is None else key
 
     @staticmethod
     def has_license(repo: Dict[str, Dict], license_key: str) -> bool:
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Local HTTP server serving the fixtures payloads or recorded cassettes.
+
+    ./fixture_server.py --port 8000 --per-page 4 --latency 0.05
+    ./fixture_server.py --record https://api.github.com --cassette gh.json
+    ./fixture_server.py --cassette gh.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Tuple,
+)
+
+import requests
+
+from fixtures import TEST_PAYLOAD
+
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+
+class FixtureServer:
+    """Stub of the GitHub API serving `TEST_PAYLOAD` on localhost.
+    Every org in `orgs` gets the fixture org and repos payloads, with
+    `repos_url` pointing back at this server. With `per_page`, repos are
+    split into pages linked by `Link: rel="next"` headers. Every route
+    carries an ETag and answers 304 to a matching If-None-Match, and every
+    answer is delayed by `latency` seconds. `hits` counts requests per
+    path and `not_modified` the 304 answers.
+    Routes can also be replayed from a `cassette` file. With `upstream`,
+    requests for unknown paths are forwarded there, served, and recorded
+    into the cassette, which is written when the server stops. URLs of
+    the recorded host are rewritten to point at this server.
+    Example
+    -------
+    >>> with FixtureServer() as server:
+    ...     get_json(server.url + "/orgs/google")["repos_url"]
+    'http://127.0.0.1:.../orgs/google/repos'
+    """
+
+    def __init__(self, orgs: Iterable[str] = ("google",),
+                 per_page: int = None, latency: float = 0.0,
+                 cassette: str = None, upstream: str = None,
+                 host: str = "127.0.0.1", port: int = 0) -> None:
+        """Init method of FixtureServer"""
+        self.routes = {}
+        self.hits = Counter()
+        self.not_modified = Counter()
+        self.latency = latency
+        self.cassette = cassette
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.recorded = []
+        self._record_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = "http://{}:{}".format(*self.httpd.server_address[:2])
+        self._thread = None
+
+        org_payload, repos_payload = TEST_PAYLOAD[0][:2]
+        for org in orgs:
+            org_path = "/orgs/{}".format(org)
+            self.add_route(org_path, dict(
+                org_payload, repos_url=self.url + org_path + "/repos"))
+            if per_page is None:
+                self.add_route(org_path + "/repos", repos_payload)
+            else:
+                self.add_pages(org_path + "/repos", repos_payload, per_page)
+        if cassette is not None and os.path.exists(cassette):
+            self.load_cassette(cassette)
+
+    def add_route(self, path: str, payload: Any,
+                  headers: Dict[str, str] = None) -> None:
+        """Serve `payload` as JSON on `path`"""
+        self.add_raw_route(path, 200, json.dumps(payload), headers)
+
+    def add_raw_route(self, path: str, status: int, body: str,
+                      headers: Dict[str, str] = None) -> None:
+        """Serve `body` verbatim with `status` on `path`"""
+        body = body.encode("utf-8")
+        headers = dict(headers or {})
+        headers.setdefault("Content-Type", "application/json")
+        headers.setdefault(
+            "ETag", '"{}"'.format(hashlib.sha1(body).hexdigest()))
+        self.routes[path] = (status, body, headers)
+
+    def load_cassette(self, path: str) -> None:
+        """Serve every interaction recorded in the cassette at `path`"""
+        with open(path, encoding="utf-8") as cassette_file:
+            cassette = json.load(cassette_file)
+        base_url = cassette["base_url"]
+        for interaction in cassette["interactions"]:
+            headers = {name: value.replace(base_url, self.url)
+                       for name, value in interaction["headers"].items()}
+            self.add_raw_route(interaction["path"], interaction["status"],
+                               interaction["body"].replace(base_url,
+                                                           self.url),
+                               headers)
+        self.recorded.extend(cassette["interactions"])
+
+    def save_cassette(self, path: str) -> None:
+        """Write the recorded interactions to `path`"""
+        with self._record_lock:
+            cassette = {"base_url": self.upstream,
+                        "interactions": list(self.recorded)}
+        with open(path, "w", encoding="utf-8") as cassette_file:
+            json.dump(cassette, cassette_file, indent=1)
+
+    def _record(self, path: str) -> Tuple[int, bytes, Dict[str, str]]:
+        """Fetch `path` from upstream, serve it from now on, record it"""
+        response = requests.get(self.upstream + path)
+        interaction = {
+            "path": path,
+            "status": response.status_code,
+            "headers": {name: response.headers[name]
+                        for name in RECORDED_HEADERS
+                        if name in response.headers},
+            "body": response.text,
+        }
+        with self._record_lock:
+            if path not in self.routes:
+                self.recorded.append(interaction)
+                self.add_raw_route(
+                    path, interaction["status"],
+                    interaction["body"].replace(self.upstream, self.url),
+                    {name: value.replace(self.upstream, self.url)
+                     for name, value in interaction["headers"].items()})
+            return self.routes[path]
+
+    def add_pages(self, path: str, items: List[Any], per_page: int) -> None:
+        """Serve `items` as pages of `per_page` on `path`, `path?page=2`..."""
+        pages = [items[start:start + per_page]
+                 for start in range(0, len(items), per_page)] or [[]]
+        for number, page in enumerate(pages, 1):
+            page_path = path if number == 1 else "{}?page={}".format(
+                path, number)
+            headers = {}
+            if number < len(pages):
+                headers["Link"] = '<{}{}?page={}>; rel="next"'.format(
+                    self.url, path, number + 1)
+            self.add_route(page_path, page, headers)
+
+    def _handler(self) -> type:
+        """Build the request handler class bound to this server"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Serve the routes of the enclosing FixtureServer"""
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                """Answer a GET with the matching route, or 404"""
+                server.hits[self.path] += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                route = server.routes.get(self.path)
+                if route is None and server.upstream is not None:
+                    route = server._record(self.path)
+                if route is None:
+                    self.send_error(404)
+                    return
+                status, body, headers = route
+                if self.headers.get("If-None-Match") == headers["ETag"]:
+                    server.not_modified[self.path] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", headers["ETag"])
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                """Keep test output quiet"""
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Shut the server down, saving the cassette when recording"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread.join()
+        if self.cassette is not None and self.upstream is not None:
+            self.save_cassette(self.cassette)
+
+    def __enter__(self) -> "FixtureServer":
+        """Start the server"""
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop the server"""
+        self.stop()
+
+
+def main() -> None:
+    """Run a FixtureServer in the foreground"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--orgs", nargs="*", default=["google"],
+                        help="orgs served from fixtures.py")
+    parser.add_argument("--per-page", type=int, default=None)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds added to every answer")
+    parser.add_argument("--cassette", default=None,
+                        help="cassette file to replay or record into")
+    parser.add_argument("--record", metavar="UPSTREAM", default=None,
+                        help="forward and record unknown paths")
+    args = parser.parse_args()
+
+    server = FixtureServer(orgs=args.orgs, per_page=args.per_page,
+                           latency=args.latency, cassette=args.cassette,
+                           upstream=args.record, host=args.host,
+                           port=args.port)
+    print("Serving on {}".format(server.url))
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Integration tests for async_client.AsyncGithubOrgClient
+"""
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from async_client import AsyncGithubOrgClient
+from fixture_server import FixtureServer
+from fixtures import TEST_PAYLOAD
+
+ORGS = ["google", "abc", "holberton"]
+
+
+class TestAsyncGithubOrgClient(unittest.IsolatedAsyncioTestCase):
+    """Integration tests against a local stub of the GitHub API"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start the fixture server and point the client at it"""
+        (cls.org_payload, cls.repos_payload,
+         cls.expected_repos, cls.apache2_repos) = TEST_PAYLOAD[0]
+        cls.server = FixtureServer(orgs=ORGS).start()
+        cls.url_patcher = patch.object(AsyncGithubOrgClient, "ORG_URL",
+                                       cls.server.url + "/orgs/{org}")
+        cls.url_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the patcher and the server"""
+        cls.url_patcher.stop()
+        cls.server.stop()
+
+    def setUp(self):
+        """Reset the request counters"""
+        self.server.hits.clear()
+
+    async def test_public_repos(self):
+        """Test public_repos over HTTP"""
+        client_obj = AsyncGithubOrgClient("google")
+        self.assertEqual(await client_obj.public_repos(),
+                         self.expected_repos)
+
+    async def test_public_repos_with_license(self):
+        """Test public_repos with license filtering over HTTP"""
+        client_obj = AsyncGithubOrgClient("google")
+        self.assertEqual(await client_obj.public_repos(license="apache-2.0"),
+                         self.apache2_repos)
+
+    async def test_payloads_are_fetched_once(self):
+        """Test that repeated queries reuse the memoized payloads"""
+        client_obj = AsyncGithubOrgClient("google")
+        await client_obj.public_repos()
+        await client_obj.public_repos(license="apache-2.0")
+
+        self.assertEqual(self.server.hits["/orgs/google"], 1)
+        self.assertEqual(self.server.hits["/orgs/google/repos"], 1)
+
+    async def test_public_repos_many(self):
+        """Test fetching several orgs concurrently"""
+        result = await AsyncGithubOrgClient.public_repos_many(
+            ORGS + ["google"], license="apache-2.0", concurrency=2)
+
+        self.assertEqual(result, {org: self.apache2_repos for org in ORGS})
+        for org in ORGS:
+            self.assertEqual(self.server.hits["/orgs/" + org], 1)
+            self.assertEqual(self.server.hits["/orgs/{}/repos".format(org)],
+                             1)
+
+    async def test_public_repos_many_fails_fast(self):
+        """Test that a failing org neither waits for nor leaves running
+        the other fetches"""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        started = []
+
+        def get_json(url, session=None):
+            started.append(url)
+            if "/broken" in url:
+                raise ConnectionError("unreachable")
+            release.wait(5)
+            return {"repos_url": url + "/repos"}
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.ensure_future(ticker())
+        start = time.monotonic()
+        with patch("async_client.get_json", get_json):
+            with self.assertRaises(ConnectionError):
+                await AsyncGithubOrgClient.public_repos_many(
+                    ["slow", "broken", "queued", "later"], concurrency=2)
+        elapsed = time.monotonic() - start
+        await asyncio.sleep(0.05)
+        ticking.cancel()
+
+        self.assertLess(elapsed, 1)
+        self.assertGreater(ticks, 3)
+        self.assertEqual(len(started), 2)
+        self.assertEqual(
+            [task for task in asyncio.all_tasks()
+             if task.get_coro().__qualname__.startswith(
+                 "AsyncGithubOrgClient.")], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,12 +2,17 @@
 """
 Unit tests and integration tests for client.GithubOrgClient
 """
+import os
+import tempfile
+import time
 import unittest
-from unittest.mock import patch, PropertyMock
+from unittest.mock import Mock, patch, PropertyMock
 from parameterized import parameterized, parameterized_class
 from client import GithubOrgClient
-from fixtures import (org_payload, repos_payload, expected_repos,
-                      apache2_repos, TEST_PAYLOAD)
+from fixture_server import FixtureServer
+from fixtures import TEST_PAYLOAD
+
+org_payload, repos_payload, expected_repos, apache2_repos = TEST_PAYLOAD[0]
 
 
 class TestGithubOrgClient(unittest.TestCase):
@@ -85,6 +90,101 @@ class TestGithubOrgClient(unittest.TestCase):
         result = GithubOrgClient.has_license(repo, license_key)
         self.assertEqual(result, expected)
 
+    @parameterized.expand([
+        ("apache-2.0", apache2_repos),
+        (["bsl-1.0", "bsd-3-clause"], ["episodes.dart", "cpp-netlib"]),
+        ({"other", GithubOrgClient.NO_LICENSE},
+         ["ios-webkit-debug-proxy", "google.github.io",
+          "build-debian-cloud"]),
+        (GithubOrgClient.NO_LICENSE, ["google.github.io"]),
+        ("mit", []),
+    ])
+    def test_public_repos_license_index(self, license, expected):
+        """Test public_repos license queries answered from the index"""
+        with patch.object(
+            GithubOrgClient,
+            "repos_payload",
+            new_callable=PropertyMock
+        ) as mock_payload:
+            mock_payload.return_value = repos_payload
+            client_obj = GithubOrgClient("google")
+
+            self.assertEqual(client_obj.public_repos(license=license),
+                             expected)
+
+    def test_projected_repos(self):
+        """Test that projected_repos keeps only the requested fields"""
+        with patch.object(GithubOrgClient, "iter_repos",
+                          side_effect=lambda incremental: iter(repos_payload)):
+            client_obj = GithubOrgClient("google")
+
+            records = client_obj.projected_repos()
+            names = client_obj.projected_repos(fields=["name"])
+            odd = client_obj.projected_repos(fields=["name", "class"])
+
+        self.assertEqual([record.name for record in records], expected_repos)
+        self.assertEqual(records[4].license_key, None)
+        self.assertEqual(records[2], ("dagger", "apache-2.0"))
+        self.assertEqual(records[2]._fields, ("name", "license_key"))
+        self.assertEqual([record.name for record in names], expected_repos)
+        self.assertEqual(odd[0]._fields, ("name", "_1"))
+
+    @parameterized.expand([
+        (None, expected_repos),
+        ("apache-2.0", apache2_repos),
+        (GithubOrgClient.NO_LICENSE, ["google.github.io"]),
+    ])
+    def test_projected_client(self, license, expected):
+        """Test that a projected client keeps records, not repo dicts"""
+        with patch("client.get_json",
+                   side_effect=[org_payload, repos_payload]
+                   ) as mock_get_json:
+            client_obj = GithubOrgClient("google", fields=["owner.login"])
+
+            self.assertEqual(client_obj.public_repos(license=license),
+                             expected)
+            self.assertEqual(client_obj.repos_payload[0]._fields,
+                             ("name", "license_key", "owner_login"))
+            mock_get_json.assert_called_with(org_payload["repos_url"],
+                                             session=None)
+
+    @patch("client.get_json")
+    def test_license_lookup_reuses_names(self, mock_get_json):
+        """Test that repeated license queries reuse the memoized names"""
+        mock_get_json.side_effect = [org_payload, repos_payload]
+        client_obj = GithubOrgClient("google")
+
+        self.assertEqual(client_obj.public_repos(license="apache-2.0"),
+                         apache2_repos)
+        names = client_obj._license_index_of[2]
+        client_obj.public_repos(license="mit")
+        all_names = client_obj.public_repos()
+
+        self.assertIs(client_obj._license_index_of[2], names)
+        self.assertEqual(all_names, expected_repos)
+        all_names.append("mutated")
+        self.assertEqual(client_obj.public_repos(), expected_repos)
+
+    @patch("client.get_json")
+    def test_license_index_refresh(self, mock_get_json):
+        """Test that the index is built once per repos payload"""
+        mock_get_json.side_effect = [
+            {"repos_url": "https://api.github.com/orgs/google/repos"},
+            [{"name": "a", "license": {"key": "mit"}}],
+            {"repos_url": "https://api.github.com/orgs/google/repos"},
+            [{"name": "b", "license": {"key": "mit"}}],
+        ]
+        client_obj = GithubOrgClient("google")
+
+        self.assertEqual(client_obj.public_repos(license="mit"), ["a"])
+        index = client_obj._license_index
+        client_obj.public_repos(license="apache-2.0")
+        self.assertIs(client_obj._license_index, index)
+
+        client_obj.refresh()
+        self.assertEqual(client_obj.public_repos(license="mit"), ["b"])
+        self.assertEqual(mock_get_json.call_count, 4)
+
 
 # ---------------- Integration Tests ---------------- #
 
@@ -106,14 +206,17 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
         cls.get_patcher = patch("requests.get")
         mock_get = cls.get_patcher.start()
 
-        def mock_json(url):
+        def mock_response(url, **kwargs):
+            response = Mock(links={}, headers={})
             if url.endswith("/orgs/google"):
-                return cls.org_payload
-            if url.endswith("/orgs/google/repos"):
-                return cls.repos_payload
-            return None
+                response.json.return_value = cls.org_payload
+            elif url.endswith("/orgs/google/repos"):
+                response.json.return_value = cls.repos_payload
+            else:
+                response.json.return_value = None
+            return response
 
-        mock_get.return_value.json.side_effect = mock_json
+        mock_get.side_effect = mock_response
 
     @classmethod
     def tearDownClass(cls):
@@ -133,5 +236,126 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
         self.assertEqual(repos, self.apache2_repos)
 
 
+class TestPaginatedGithubOrgClient(unittest.TestCase):
+    """Integration tests for paginated repos over a local HTTP server"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Serve the fixtures four repos per page"""
+        cls.server = FixtureServer(per_page=4).start()
+        cls.url_patcher = patch.object(GithubOrgClient, "ORG_URL",
+                                       cls.server.url + "/orgs/{org}")
+        cls.url_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the patcher and the server"""
+        cls.url_patcher.stop()
+        cls.server.stop()
+
+    def test_iter_repos(self):
+        """Test that iter_repos walks every page once"""
+        client_obj = GithubOrgClient("google")
+        self.server.hits.clear()
+
+        for incremental in (False, True):
+            self.server.hits.clear()
+
+            names = [repo["name"]
+                     for repo in client_obj.iter_repos(incremental)]
+
+            self.assertEqual(names, expected_repos)
+            for page in ("", "?page=2", "?page=3"):
+                self.assertEqual(
+                    self.server.hits["/orgs/google/repos" + page], 1)
+
+    def test_public_repos_stream(self):
+        """Test streamed public_repos with and without a license"""
+        client_obj = GithubOrgClient("google")
+
+        self.assertEqual(client_obj.public_repos(stream=True),
+                         expected_repos)
+        self.assertEqual(
+            client_obj.public_repos(license="apache-2.0", stream=True),
+            apache2_repos)
+
+    def test_public_repos_stream_prefetches(self):
+        """Test that streaming requests the next page before the current
+        one is consumed"""
+        client_obj = GithubOrgClient("google")
+        client_obj.org
+        self.server.hits.clear()
+
+        names = client_obj.iter_public_repos()
+        self.assertEqual(next(names), expected_repos[0])
+        for _ in range(100):
+            if self.server.hits["/orgs/google/repos?page=2"]:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.server.hits["/orgs/google/repos?page=2"], 1)
+        names.close()
+
+    def test_projection_keeps_the_same_repos(self):
+        """Test that fields change the records, not which repos come back"""
+        plain = GithubOrgClient("google")
+        projected = GithubOrgClient("google", fields=())
+
+        self.assertEqual(projected.public_repos(), plain.public_repos())
+        self.assertEqual(len(plain.public_repos()), 4)
+        self.assertEqual(projected.public_repos(license="apache-2.0"),
+                         plain.public_repos(license="apache-2.0"))
+
+    def test_projected_repos_stream(self):
+        """Test projecting streamed repos across pages"""
+        client_obj = GithubOrgClient("google")
+
+        records = client_obj.projected_repos(["name", "owner.login"])
+
+        self.assertEqual([record.name for record in records], expected_repos)
+        self.assertEqual({record.owner_login for record in records},
+                         {"google"})
+
+
+class TestRecordReplay(unittest.TestCase):
+    """Integration tests for recording and replaying cassettes"""
+
+    def public_repos_from(self, server, license=None):
+        """Run public_repos against `server`"""
+        with patch.object(GithubOrgClient, "ORG_URL",
+                          server.url + "/orgs/{org}"):
+            return GithubOrgClient("google").public_repos(license=license,
+                                                          stream=True)
+
+    def test_record_then_replay(self):
+        """Test that a recorded session replays without the upstream"""
+        with tempfile.TemporaryDirectory() as directory:
+            cassette = os.path.join(directory, "google.json")
+            with FixtureServer(per_page=4) as upstream:
+                with FixtureServer(orgs=(), cassette=cassette,
+                                   upstream=upstream.url) as recorder:
+                    recorded = self.public_repos_from(recorder)
+                self.assertEqual(upstream.hits["/orgs/google"], 1)
+
+            with FixtureServer(orgs=(), cassette=cassette) as replay:
+                replayed = self.public_repos_from(replay)
+                licensed = self.public_repos_from(replay, "apache-2.0")
+
+                self.assertEqual(replay.hits["/orgs/google/repos?page=3"],
+                                 2)
+
+        self.assertEqual(recorded, expected_repos)
+        self.assertEqual(replayed, expected_repos)
+        self.assertEqual(licensed, apache2_repos)
+
+    def test_latency(self):
+        """Test that every answer is delayed by the configured latency"""
+        with FixtureServer(per_page=4, latency=0.05) as server:
+            start = time.perf_counter()
+            self.public_repos_from(server)
+            elapsed = time.perf_counter() - start
+
+        self.assertGreaterEqual(elapsed, 4 * 0.05)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,11 +1,281 @@
 #!/usr/bin/env python3
 """
-Unit tests for utils.memoize.
+Unit tests for utils.compile_path, utils.pluck, utils.get_json,
+utils.memoize, utils.async_memoize and utils.cached.
 """
 
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
 import unittest
-from unittest.mock import patch
-from utils import memoize
+from unittest.mock import AsyncMock, Mock, patch
+import requests
+from fixture_server import FixtureServer
+from collections import OrderedDict
+from fixtures import TEST_PAYLOAD
+from utils import (access_nested_map, async_memoize, cached, compile_path,
+                   get_json, HTTPCache, iter_json_array, iter_json_items,
+                   iter_json_pages, memoize, pluck, PooledSession,
+                   set_http_cache, set_session)
+
+CACHING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, "caching")
+
+
+def caching_policy(module: str, name: str):
+    """Import a policy class from the sibling caching project."""
+    if CACHING_DIR not in sys.path:
+        sys.path.append(CACHING_DIR)
+    return getattr(__import__(module), name)
+
+
+class TestCompilePath(unittest.TestCase):
+    """Test class for compile_path and pluck."""
+
+    CASES = [
+        ({"a": 1}, ("a",)),
+        ({"a": {"b": 2}}, ("a",)),
+        ({"a": {"b": 2}}, ("a", "b")),
+        ({"a": {"b": {"c": 3}}}, ("a", "b", "c")),
+        (OrderedDict(a=OrderedDict(b=4)), ("a", "b")),
+        ({"a": 1}, ()),
+    ]
+    MISSING = [
+        ({}, ("a",), "a"),
+        ({"a": 1}, ("a", "b"), "b"),
+        ({"a": "xyz"}, ("a", "b"), "b"),
+        ({"a": [1, 2]}, ("a", 0), 0),
+        ({"a": {"b": 5}}, ("a", "b", "c"), "c"),
+        ([1], ("a",), "a"),
+    ]
+
+    def test_matches_access_nested_map(self):
+        """Test that compiled getters return the same values."""
+        for nested_map, path in self.CASES:
+            with self.subTest(path=path):
+                self.assertEqual(compile_path(path)(nested_map),
+                                 access_nested_map(nested_map, path))
+
+    def test_key_error(self):
+        """Test that compiled getters raise the same KeyError."""
+        for nested_map, path, key in self.MISSING:
+            with self.subTest(path=path):
+                with self.assertRaises(KeyError) as error:
+                    compile_path(path)(nested_map)
+                self.assertEqual(error.exception.args, (key,))
+
+    def test_pluck(self):
+        """Test pulling one or several paths from a list of records."""
+        records = [{"name": "a", "license": {"key": "mit"}},
+                   {"name": "b", "license": None}]
+
+        self.assertEqual(pluck(records, ("name",)), ["a", "b"])
+        self.assertEqual(pluck(records, ("license", "key"), default=None),
+                         ["mit", None])
+        self.assertEqual(
+            pluck(records, ("name",), ("license", "key"), default=""),
+            [("a", "mit"), ("b", "")])
+        with self.assertRaises(KeyError):
+            pluck(records, ("license", "key"))
+
+
+class TestGetJson(unittest.TestCase):
+    """Test class for get_json and its session handling."""
+
+    def tearDown(self):
+        """Restore the default transport and cache."""
+        set_session(None)
+        set_http_cache(None)
+
+    @patch("requests.get")
+    def test_get_json(self, mock_get):
+        """Test that get_json returns the decoded payload."""
+        mock_get.return_value.json.return_value = {"payload": True}
+
+        self.assertEqual(get_json("http://example.com"), {"payload": True})
+        mock_get.assert_called_once_with("http://example.com")
+
+    @patch("requests.get")
+    def test_get_json_with_session(self, mock_get):
+        """Test that an explicit or default session replaces requests.get."""
+        session = Mock()
+        session.get.return_value.json.return_value = {"payload": 1}
+
+        self.assertEqual(get_json("http://a.com", session=session),
+                         {"payload": 1})
+        set_session(session)
+        get_json("http://b.com")
+
+        self.assertEqual(session.get.call_count, 2)
+        session.get.assert_called_with("http://b.com")
+        mock_get.assert_not_called()
+
+    @patch.object(requests.Session, "request")
+    def test_pooled_session_timeout(self, mock_request):
+        """Test that PooledSession applies its default timeout."""
+        session = PooledSession(pool_size=4, timeout=2.5)
+
+        session.get("http://example.com")
+        session.get("http://example.com", timeout=1)
+
+        self.assertEqual(mock_request.call_args_list[0].kwargs["timeout"],
+                         2.5)
+        self.assertEqual(mock_request.call_args_list[1].kwargs["timeout"], 1)
+        adapter = session.get_adapter("https://example.com")
+        self.assertEqual(adapter.max_retries.total, 3)
+
+    def test_conditional_requests(self):
+        """Test that cached validators are sent and 304 reuses the body."""
+        first = Mock(status_code=200, headers={"ETag": '"v1"'})
+        first.json.return_value = {"repos": [1, 2]}
+        second = Mock(status_code=304, headers={})
+        session = Mock()
+        session.get.side_effect = [first, second]
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = HTTPCache(directory)
+            self.assertEqual(get_json("http://a.com", session, cache),
+                             {"repos": [1, 2]})
+            self.assertEqual(get_json("http://a.com", session, cache),
+                             {"repos": [1, 2]})
+
+            session.get.assert_called_with(
+                "http://a.com", headers={"If-None-Match": '"v1"'})
+            second.json.assert_not_called()
+            self.assertEqual(HTTPCache(directory).get("http://a.com"),
+                             {"etag": '"v1"', "last_modified": None,
+                              "body": {"repos": [1, 2]}})
+
+    def test_conditional_requests_over_http(self):
+        """Test that a restarted cache revalidates against the server."""
+        with FixtureServer() as server, \
+                tempfile.TemporaryDirectory() as directory:
+            url = server.url + "/orgs/google"
+            set_http_cache(HTTPCache(directory))
+            payload = get_json(url)
+            set_http_cache(HTTPCache(directory))
+
+            self.assertEqual(get_json(url), payload)
+            self.assertEqual(server.hits["/orgs/google"], 2)
+            self.assertEqual(server.not_modified["/orgs/google"], 1)
+
+
+class TestIterJsonPages(unittest.TestCase):
+    """Test class for iter_json_pages."""
+
+    @staticmethod
+    def make_session(pages):
+        """Return a mock session serving `pages` linked by rel=next."""
+        responses = {}
+        for number, page in enumerate(pages):
+            response = Mock()
+            response.json.return_value = page
+            response.links = {}
+            if number + 1 < len(pages):
+                response.links["next"] = {"url": "page{}".format(number + 1)}
+            responses["page{}".format(number)] = response
+        return Mock(get=Mock(side_effect=responses.__getitem__))
+
+    def test_follows_next_links(self):
+        """Test that every page is yielded in order."""
+        for prefetch in (True, False):
+            session = self.make_session([[1, 2], [3, 4], [5]])
+
+            pages = list(iter_json_pages("page0", session, prefetch))
+
+            self.assertEqual(pages, [[1, 2], [3, 4], [5]])
+            self.assertEqual(session.get.call_count, 3)
+
+    def test_prefetches_next_page(self):
+        """Test that the next page is requested before it is consumed."""
+        session = self.make_session([[1], [2], [3]])
+        pages = iter_json_pages("page0", session)
+
+        self.assertEqual(next(pages), [1])
+        for _ in range(100):
+            if session.get.call_count == 2:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(session.get.call_count, 2)
+        pages.close()
+
+
+class TestIterJsonArray(unittest.TestCase):
+    """Test class for the incremental JSON array decoder."""
+
+    def test_any_chunking(self):
+        """Test that elements decode the same however bytes are split."""
+        items = TEST_PAYLOAD[0][1] + [1, 2.5, "\u00e9\u2603", None,
+                                      [1, [2]], -3e5, True]
+        data = json.dumps(items, ensure_ascii=False).encode("utf-8")
+        for size in (1, 3, 64, len(data)):
+            with self.subTest(size=size):
+                chunks = (data[start:start + size]
+                          for start in range(0, len(data), size))
+                self.assertEqual(list(iter_json_array(chunks)), items)
+
+    def test_empty_array(self):
+        """Test that an empty array yields nothing."""
+        self.assertEqual(list(iter_json_array([b" [ ", b"] "])), [])
+
+    def test_malformed(self):
+        """Test that malformed or truncated documents raise ValueError."""
+        for data in (b'{"a": 1}', b"[1,", b"[1 2]", b"[1,]", b""):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    list(iter_json_array([data]))
+
+    @staticmethod
+    def make_session(pages):
+        """Return a mock session streaming `pages` linked by rel=next."""
+        responses = {}
+        for number, page in enumerate(pages):
+            response = Mock()
+            response.iter_content.return_value = [json.dumps(page).encode()]
+            response.links = {}
+            if number + 1 < len(pages):
+                response.links["next"] = {"url": "page{}".format(number + 1)}
+            responses["page{}".format(number)] = response
+        return Mock(get=Mock(side_effect=lambda url, **kwargs:
+                             responses[url]))
+
+    def test_iter_json_items_follows_next_links(self):
+        """Test that every element is yielded in order, with and without
+        prefetch, and that every response is closed."""
+        for prefetch in (True, False):
+            session = self.make_session([[1, 2], [3, 4], [5]])
+
+            items = list(iter_json_items("page0", session,
+                                         prefetch=prefetch))
+
+            self.assertEqual(items, [1, 2, 3, 4, 5])
+            self.assertEqual(session.get.call_count, 3)
+            for call in session.get.call_args_list:
+                session.get.side_effect(*call.args).close.assert_called()
+
+    def test_iter_json_items_prefetches_next_page(self):
+        """Test that the next page is requested before it is consumed."""
+        session = self.make_session([[1, 2], [3], [4]])
+        items = iter_json_items("page0", session)
+
+        self.assertEqual(next(items), 1)
+        for _ in range(100):
+            if session.get.call_count == 2:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(session.get.call_count, 2)
+        items.close()
+
+    def test_iter_json_items_over_http(self):
+        """Test streaming every element across linked pages."""
+        with FixtureServer(per_page=2) as server:
+            repos = list(iter_json_items(
+                server.url + "/orgs/google/repos", chunk_size=128))
+
+        self.assertEqual(repos, TEST_PAYLOAD[0][1])
 
 
 class TestMemoize(unittest.TestCase):
@@ -39,5 +309,206 @@ class TestMemoize(unittest.TestCase):
             mock_method.assert_called_once()
 
 
+class TestAsyncMemoize(unittest.IsolatedAsyncioTestCase):
+    """Test class for the async_memoize decorator."""
+
+    def make_class(self, fetch):
+        """Return a class whose memoized coroutine awaits `fetch`."""
+
+        class TestClass:
+            """Test class with a memoized coroutine property."""
+
+            @async_memoize
+            async def a_property(self):
+                """Return the awaited result of fetch."""
+                return await fetch()
+
+        return TestClass
+
+    async def test_caches_awaited_result(self):
+        """Test that the coroutine runs once and its result is cached."""
+        fetch = AsyncMock(return_value=42)
+        test_obj = self.make_class(fetch)()
+
+        self.assertEqual(await test_obj.a_property, 42)
+        self.assertEqual(await test_obj.a_property, 42)
+        fetch.assert_awaited_once()
+
+    async def test_concurrent_awaiters_share_one_call(self):
+        """Test that concurrent awaiters are deduplicated."""
+        release = asyncio.Event()
+
+        async def slow():
+            """Wait until released."""
+            await release.wait()
+            return "done"
+
+        fetch = AsyncMock(side_effect=slow)
+        test_obj = self.make_class(fetch)()
+
+        waiters = [asyncio.ensure_future(test_obj.a_property)
+                   for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await asyncio.gather(*waiters), ["done"] * 5)
+        fetch.assert_awaited_once()
+
+    async def test_failures_are_not_cached(self):
+        """Test that a failed call is retried on the next await."""
+        fetch = AsyncMock(side_effect=[ValueError("boom"), 7])
+        test_obj = self.make_class(fetch)()
+
+        with self.assertRaises(ValueError):
+            await test_obj.a_property
+        self.assertEqual(await test_obj.a_property, 7)
+        self.assertEqual(fetch.await_count, 2)
+
+
+class TestCached(unittest.TestCase):
+    """Test class for the cached decorator."""
+
+    def test_caches_by_arguments(self):
+        """Test that each distinct call is computed once."""
+        compute = Mock(side_effect=lambda x, y=0: x + y)
+        add = cached()(compute)
+
+        self.assertEqual(add(1), 1)
+        self.assertEqual(add(1), 1)
+        self.assertEqual(add(1, y=2), 3)
+        self.assertEqual(add(1, y=2), 3)
+
+        self.assertEqual(compute.call_count, 2)
+        self.assertEqual(add.stats["hits"], 2)
+        self.assertEqual(add.stats["misses"], 2)
+
+    def test_bounded_size(self):
+        """Test that the least recently used result is evicted."""
+        compute = Mock(side_effect=lambda x: x * 2)
+        double = cached(maxsize=2)(compute)
+
+        double(1)
+        double(2)
+        double(1)
+        double(3)
+        double(1)
+        double(2)
+
+        self.assertEqual(compute.call_count, 4)
+
+    def test_cache_factory(self):
+        """Test that results are kept in the store the factory builds."""
+        store = {}
+        factory = Mock(return_value=Mock(get=store.get,
+                                         put=store.__setitem__))
+        compute = Mock(return_value=42)
+        answer = cached(factory)(compute)
+
+        answer("a")
+        answer("a")
+
+        compute.assert_called_once_with("a")
+        self.assertEqual(store, {("a",): (42,)})
+
+    def test_none_result_is_cached(self):
+        """Test that a None result counts as a cached value."""
+        compute = Mock(return_value=None)
+        nothing = cached()(compute)
+
+        self.assertIsNone(nothing())
+        self.assertIsNone(nothing())
+        compute.assert_called_once()
+
+    def test_invalidate_and_clear(self):
+        """Test that invalidate and cache_clear force a recomputation."""
+        compute = Mock(side_effect=lambda x: x)
+        identity = cached()(compute)
+
+        identity(1)
+        identity(2)
+        identity.invalidate(1)
+        identity(1)
+        identity(2)
+        self.assertEqual(compute.call_count, 3)
+
+        identity.cache_clear()
+        identity(2)
+        self.assertEqual(compute.call_count, 4)
+
+    def test_invalidate_keeps_other_entries(self):
+        """Test that invalidating under maxsize evicts nothing else."""
+        compute = Mock(side_effect=lambda x: x)
+        identity = cached(maxsize=2)(compute)
+
+        identity(1)
+        identity(2)
+        identity.invalidate(1)
+        identity(3)
+        identity(2)
+        self.assertEqual(compute.call_count, 3)
+        self.assertEqual(identity.stats["hits"], 1)
+
+    def test_invalidate_with_caching_policies(self):
+        """Test that invalidate keeps the policies' bookkeeping in step."""
+        factories = {
+            "LFUCache": caching_policy("101-lfu_cache", "LFUCache"),
+            "ARCCache": caching_policy("102-arc_cache", "ARCCache"),
+            "TTLCache": lambda: caching_policy(
+                "103-ttl_cache", "TTLCache")(ttl=60),
+        }
+        for name, policy in factories.items():
+            with self.subTest(policy=name):
+                def factory():
+                    store = policy()
+                    store.on_discard = lambda key: None
+                    return store
+
+                compute = Mock(side_effect=lambda x: x)
+                identity = cached(factory)(compute)
+                for x in range(4):
+                    identity(x)
+                identity.invalidate(0)
+                for x in range(4, 12):
+                    identity(x)
+                    identity(x)
+                self.assertEqual(identity(0), 0)
+                self.assertEqual(compute.call_count, 13)
+
+    def test_errors_are_not_cached(self):
+        """Test that a failing call is retried on the next call."""
+        compute = Mock(side_effect=[ValueError("boom"), 7])
+        flaky = cached()(compute)
+
+        with self.assertRaises(ValueError):
+            flaky()
+        self.assertEqual(flaky(), 7)
+
+    def test_single_flight(self):
+        """Test that concurrent callers share one computation."""
+        release = threading.Event()
+        calls = []
+
+        @cached()
+        def slow(x):
+            """Block until released."""
+            calls.append(x)
+            release.wait()
+            return x
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(slow(5)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        while slow.stats["misses"] + slow.stats["shared"] < 8:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, [5])
+        self.assertEqual(results, [5] * 8)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,75 +1,663 @@
-#!/usr/bin/env python3
-"""Generic utilities for github org client.
-"""
-import requests
-from functools import wraps
-from typing import (
-    Mapping,
-    Sequence,
-    Any,
-    Dict,
-    Callable,
-)
-
-__all__ = [
-    "access_nested_map",
-    "get_json",
-    "memoize",
-]
-
-
-def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
-    """Access nested map with key path.
-    Parameters
-    ----------
-    nested_map: Mapping
-        A nested map
-    path: Sequence
-        a sequence of key representing a path to the value
-    Example
-    -------
-    >>> nested_map = {"a": {"b": {"c": 1}}}
-    >>> access_nested_map(nested_map, ["a", "b", "c"])
-    1
-    """
-    for key in path:
-        if not isinstance(nested_map, Mapping):
-            raise KeyError(key)
-        nested_map = nested_map[key]
-
-    return nested_map
-
-
-def get_json(url: str) -> Dict:
-    """Get JSON from remote URL.
-    """
-    response = requests.get(url)
-    return response.json()
-
-
-def memoize(fn: Callable) -> Callable:
-    """Decorator to memoize a method.
-    Example
-    -------
-    class MyClass:
-        @memoize
-        def a_method(self):
-            print("a_method called")
-            return 42
-    >>> my_object = MyClass()
-    >>> my_object.a_method
-    a_method called
-    42
-    >>> my_object.a_method
-    42
-    """
-    attr_name = "_{}".format(fn.__name__)
-
-    @wraps(fn)
-    def memoized(self):
-        """"memoized wraps"""
-        if not hasattr(self, attr_name):
-            setattr(self, attr_name, fn(self))
-        return getattr(self, attr_name)
-
-    return property(memoized)
+#!/usr/bin/env python3
+"""Generic utilities for github org client.
+"""
+import asyncio
+import codecs
+import hashlib
+import json
+import os
+import random
+import re
+import requests
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from functools import wraps
+from typing import (
+    Mapping,
+    Sequence,
+    Any,
+    Dict,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+__all__ = [
+    "access_nested_map",
+    "compile_path",
+    "pluck",
+    "get_json",
+    "HTTPCache",
+    "set_http_cache",
+    "iter_json_pages",
+    "iter_json_array",
+    "iter_json_items",
+    "PooledSession",
+    "set_session",
+    "memoize",
+    "async_memoize",
+    "cached",
+]
+
+
+def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
+    """Access nested map with key path.
+    Parameters
+    ----------
+    nested_map: Mapping
+        A nested map
+    path: Sequence
+        a sequence of key representing a path to the value
+    Example
+    -------
+    >>> nested_map = {"a": {"b": {"c": 1}}}
+    >>> access_nested_map(nested_map, ["a", "b", "c"])
+    1
+    """
+    for key in path:
+        if not isinstance(nested_map, Mapping):
+            raise KeyError(key)
+        nested_map = nested_map[key]
+
+    return nested_map
+
+
+def compile_path(path: Sequence) -> Callable[[Mapping], Any]:
+    """Turn a key path into a reusable getter.
+    The getter behaves like `access_nested_map(nested_map, path)`,
+    including the KeyError on missing keys or non-mapping steps, but
+    skips the Mapping ABC check while every step is a plain dict.
+    Example
+    -------
+    >>> license_key = compile_path(("license", "key"))
+    >>> license_key({"license": {"key": "mit"}})
+    'mit'
+    """
+    keys = tuple(path)
+
+    if len(keys) == 1:
+        first, = keys
+
+        def getter(nested_map: Mapping) -> Any:
+            """Get the compiled path out of `nested_map`"""
+            if type(nested_map) is dict:
+                return nested_map[first]
+            return access_nested_map(nested_map, keys)
+    elif len(keys) == 2:
+        first, second = keys
+
+        def getter(nested_map: Mapping) -> Any:
+            """Get the compiled path out of `nested_map`"""
+            if type(nested_map) is dict:
+                value = nested_map[first]
+                if type(value) is dict:
+                    return value[second]
+            return access_nested_map(nested_map, keys)
+    else:
+        def getter(nested_map: Mapping) -> Any:
+            """Get the compiled path out of `nested_map`"""
+            for key in keys:
+                if type(nested_map) is not dict and \
+                        not isinstance(nested_map, Mapping):
+                    raise KeyError(key)
+                nested_map = nested_map[key]
+            return nested_map
+
+    return getter
+
+
+_RAISE = object()
+
+
+def pluck(records: Iterable[Mapping], *paths: Sequence,
+          default: Any = _RAISE) -> List[Any]:
+    """Pull one or more key paths out of every record in one pass.
+    Returns a list of values for a single path, or of tuples for
+    several. A missing path raises KeyError unless `default` is given.
+    Example
+    -------
+    >>> repos = [{"name": "a", "license": {"key": "mit"}}]
+    >>> pluck(repos, ("name",), ("license", "key"))
+    [('a', 'mit')]
+    """
+    getters = [compile_path(path) for path in paths]
+    if default is _RAISE:
+        if len(getters) == 1:
+            return list(map(getters[0], records))
+        return [tuple(getter(record) for getter in getters)
+                for record in records]
+
+    def get(getter: Callable[[Mapping], Any], record: Mapping) -> Any:
+        """Apply `getter`, falling back to `default`"""
+        try:
+            return getter(record)
+        except KeyError:
+            return default
+
+    if len(getters) == 1:
+        getter, values = getters[0], []
+        for record in records:
+            try:
+                values.append(getter(record))
+            except KeyError:
+                values.append(default)
+        return values
+    return [tuple(get(getter, record) for getter in getters)
+            for record in records]
+
+
+class JitteredRetry(Retry):
+    """Retry policy sleeping a random fraction of the exponential backoff.
+    """
+
+    def get_backoff_time(self) -> float:
+        """Full jitter: uniform between 0 and the regular backoff"""
+        return random.uniform(0, super().get_backoff_time())
+
+
+class PooledSession(requests.Session):
+    """Session reusing keep-alive connections, with timeouts and retries.
+    Parameters
+    ----------
+    pool_size: int
+        connections kept open per host
+    timeout: float
+        default (connect and read) timeout of every request, in seconds
+    retries: int
+        retries on connection errors and 429/5xx answers
+    backoff_factor: float
+        base of the jittered exponential backoff between retries
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: float = 10.0,
+                 retries: int = 3, backoff_factor: float = 0.5) -> None:
+        """Init method of PooledSession"""
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=JitteredRetry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=(429, 500, 502, 503, 504),
+            ),
+        )
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def request(self, method: str, url: str, **kwargs: Any
+                ) -> requests.Response:
+        """Send a request, applying the default timeout"""
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+_session = None
+
+
+def set_session(session: requests.Session = None) -> None:
+    """Make `session` the default transport of get_json.
+    With None, get_json goes back to a plain `requests.get` per call.
+    """
+    global _session
+    _session = session
+
+
+def _get(url: str, session: requests.Session = None,
+         headers: Dict[str, str] = None,
+         stream: bool = False) -> requests.Response:
+    """GET `url` through `session`, the default session or requests.get.
+    """
+    if session is None:
+        session = _session
+    kwargs = {"headers": headers} if headers else {}
+    if stream:
+        kwargs["stream"] = True
+    if session is None:
+        return requests.get(url, **kwargs)
+    return session.get(url, **kwargs)
+
+
+class HTTPCache:
+    """On-disk cache of JSON responses and their validators.
+    Each URL is stored as one JSON file in `directory` holding its ETag,
+    Last-Modified and decoded body; bodies read once are kept in memory
+    so a 304 answer costs no parsing at all.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """Init method of HTTPCache"""
+        self.directory = directory
+        self.entries = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        """File holding the entry of `url`"""
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + ".json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Cached entry of `url`, or None"""
+        entry = self.entries.get(url)
+        if entry is None:
+            try:
+                with open(self._path(url), encoding="utf-8") as entry_file:
+                    entry = json.load(entry_file)
+            except (OSError, ValueError):
+                return None
+            self.entries[url] = entry
+        return entry
+
+    def put(self, url: str, etag: Optional[str],
+            last_modified: Optional[str], body: Any) -> None:
+        """Store `body` of `url` with its validators"""
+        entry = {"etag": etag, "last_modified": last_modified, "body": body}
+        path = self._path(url)
+        temp_path = "{}.{}.tmp".format(path, threading.get_ident())
+        with open(temp_path, "w", encoding="utf-8") as entry_file:
+            json.dump(entry, entry_file)
+        os.replace(temp_path, path)
+        self.entries[url] = entry
+
+
+_http_cache = None
+
+
+def set_http_cache(cache: HTTPCache = None) -> None:
+    """Make `cache` the default response cache of get_json.
+    """
+    global _http_cache
+    _http_cache = cache
+
+
+def get_json(url: str, session: requests.Session = None,
+             cache: HTTPCache = None) -> Dict:
+    """Get JSON from remote URL.
+    Uses `session` if given, else the one installed with set_session,
+    else a one-off `requests.get`. With a `cache` (or one installed with
+    set_http_cache), requests are conditional on the stored ETag and
+    Last-Modified, and a 304 answer returns the cached object.
+    """
+    if cache is None:
+        cache = _http_cache
+    if cache is None:
+        return _get(url, session).json()
+
+    entry = cache.get(url)
+    headers = {}
+    if entry is not None:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+    response = _get(url, session, headers)
+    if response.status_code == 304 and entry is not None:
+        return entry["body"]
+
+    payload = response.json()
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if response.status_code == 200 and (etag or last_modified):
+        cache.put(url, etag, last_modified, payload)
+    return payload
+
+
+def _get_page(url: str, session: requests.Session = None
+              ) -> Tuple[Any, Optional[str]]:
+    """Get one page of JSON and the URL of the next one, if any.
+    """
+    response = _get(url, session)
+    return response.json(), response.links.get("next", {}).get("url")
+
+
+def iter_json_pages(url: str, session: requests.Session = None,
+                    prefetch: bool = True) -> Iterator[Any]:
+    """Yield the JSON of every page, following `Link: rel="next"`.
+    With `prefetch`, the next page is requested on a background thread
+    while the caller processes the current one.
+    Example
+    -------
+    >>> for page in iter_json_pages(repos_url):
+    ...     names.extend(repo["name"] for repo in page)
+    """
+    if not prefetch:
+        while url is not None:
+            page, url = _get_page(url, session)
+            yield page
+        return
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        future = executor.submit(_get_page, url, session)
+        while future is not None:
+            page, url = future.result()
+            future = None
+            if url is not None:
+                future = executor.submit(_get_page, url, session)
+            yield page
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def memoize(fn: Callable) -> Callable:
+    """Decorator to memoize a method.
+    Example
+    -------
+    class MyClass:
+        @memoize
+        def a_method(self):
+            print("a_method called")
+            return 42
+    >>> my_object = MyClass()
+    >>> my_object.a_method
+    a_method called
+    42
+    >>> my_object.a_method
+    42
+    """
+    attr_name = "_{}".format(fn.__name__)
+
+    @wraps(fn)
+    def memoized(self):
+        """"memoized wraps"""
+        if not hasattr(self, attr_name):
+            setattr(self, attr_name, fn(self))
+        return getattr(self, attr_name)
+
+    return property(memoized)
+
+
+def async_memoize(fn: Callable) -> Callable:
+    """Decorator to memoize a coroutine method.
+    The property returns an awaitable; the first await runs `fn` in a
+    task that concurrent awaiters share, and its result is cached.
+    A failed or cancelled run is not cached, so the next await retries.
+    Example
+    -------
+    class MyClass:
+        @async_memoize
+        async def a_method(self):
+            print("a_method called")
+            return 42
+    >>> my_object = MyClass()
+    >>> await my_object.a_method
+    a_method called
+    42
+    >>> await my_object.a_method
+    42
+    """
+    attr_name = "_{}".format(fn.__name__)
+    task_name = "_{}_task".format(fn.__name__)
+
+    @wraps(fn)
+    async def memoized(self):
+        """async memoized wraps"""
+        if hasattr(self, attr_name):
+            return getattr(self, attr_name)
+        task = getattr(self, task_name, None)
+        if task is None:
+            task = asyncio.ensure_future(fn(self))
+            setattr(self, task_name, task)
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            if task.done() and getattr(self, task_name, None) is task:
+                delattr(self, task_name)
+        setattr(self, attr_name, result)
+        return result
+
+    return property(memoized)
+
+
+class _LRUStore:
+    """Minimal LRU store with the caching policies' put/get interface.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """Init method of _LRUStore"""
+        self.maxsize = maxsize
+        self.cache_data = OrderedDict()
+
+    def put(self, key: Any, item: Any) -> None:
+        """Add an item, evicting the least recently used one if full"""
+        if key in self.cache_data:
+            self.cache_data.move_to_end(key)
+        elif len(self.cache_data) >= self.maxsize:
+            self.cache_data.popitem(last=False)
+        self.cache_data[key] = item
+
+    def get(self, key: Any) -> Any:
+        """Get an item, or None if it is not cached"""
+        if key not in self.cache_data:
+            return None
+        self.cache_data.move_to_end(key)
+        return self.cache_data[key]
+
+    def remove(self, key: Any) -> None:
+        """Drop an item if it is cached"""
+        self.cache_data.pop(key, None)
+
+
+class _Call:
+    """A computation in flight, shared by concurrent callers.
+    """
+
+    def __init__(self) -> None:
+        """Init method of _Call"""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_KWARGS_MARK = object()
+
+
+def _make_key(args: Tuple, kwargs: Dict) -> Tuple:
+    """Build a hashable cache key from call arguments.
+    """
+    if not kwargs:
+        return args
+    return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+
+
+def cached(cache_factory: Callable[[], Any] = None,
+           maxsize: int = 128) -> Callable:
+    """Decorator to memoize a function or method by its arguments.
+    Parameters
+    ----------
+    cache_factory: Callable
+        builds the store holding results; any object with the caching
+        policies' put/get/remove interface (e.g. LRUCache, LFUCache,
+        ARCCache) works and bounds the size with its own MAX_ITEMS.
+        invalidate goes through `remove`, so the policy's own bookkeeping
+        stays in step. Defaults to an LRU store of `maxsize` entries.
+    maxsize: int
+        size of the default store
+    Arguments must be hashable; for methods `self` is part of the key.
+    Concurrent calls with the same arguments share one computation,
+    and exceptions are raised to every waiter but never cached.
+    The wrapper exposes `stats`, `invalidate(*args, **kwargs)` and
+    `cache_clear()`.
+    Example
+    -------
+    >>> @cached(maxsize=2)
+    ... def square(x):
+    ...     return x * x
+    >>> square(3)
+    9
+    >>> square.stats["misses"], square.stats["hits"]
+    (1, 0)
+    """
+    if cache_factory is None:
+        def cache_factory():
+            return _LRUStore(maxsize)
+
+    def decorator(fn: Callable) -> Callable:
+        """Wrap `fn` with its own store"""
+        lock = threading.Lock()
+        in_flight = {}
+        state = {"cache": cache_factory()}
+        stats = {"hits": 0, "misses": 0, "shared": 0}
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            """cached wraps"""
+            key = _make_key(args, kwargs)
+            with lock:
+                entry = state["cache"].get(key)
+                if entry:
+                    stats["hits"] += 1
+                    return entry[0]
+                call = in_flight.get(key)
+                leader = call is None
+                if leader:
+                    call = in_flight[key] = _Call()
+                    stats["misses"] += 1
+                else:
+                    stats["shared"] += 1
+
+            if not leader:
+                call.done.wait()
+                if call.error is not None:
+                    raise call.error
+                return call.result
+
+            try:
+                call.result = fn(*args, **kwargs)
+            except BaseException as error:
+                call.error = error
+                raise
+            else:
+                with lock:
+                    state["cache"].put(key, (call.result,))
+                return call.result
+            finally:
+                with lock:
+                    del in_flight[key]
+                call.done.set()
+
+        def invalidate(*args, **kwargs) -> None:
+            """Forget the result cached for these arguments"""
+            key = _make_key(args, kwargs)
+            with lock:
+                state["cache"].remove(key)
+
+        def cache_clear() -> None:
+            """Forget every cached result"""
+            with lock:
+                state["cache"] = cache_factory()
+
+        wrapper.stats = stats
+        wrapper.invalidate = invalidate
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DELIMITERS = frozenset(",] \t\n\r")
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Decode a JSON array from UTF-8 `chunks`, yielding each element.
+    Only the element being decoded and the current chunk are held in
+    memory, never the whole document or the whole decoded list.
+    Raises ValueError if the document is not a well-formed array.
+    Example
+    -------
+    >>> list(iter_json_array([b'[{"a": 1}, {"a"', b': 2}]']))
+    [{'a': 1}, {'a': 2}]
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, state = "", 0, "start"
+    chunks = iter(chunks)
+    final = False
+    while not final:
+        chunk = next(chunks, None)
+        final = chunk is None
+        buffer = buffer[pos:] + text.decode(chunk or b"", final)
+        pos = 0
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if state == "start":
+                if char != "[":
+                    raise ValueError("expected a JSON array")
+                pos, state = pos + 1, "first"
+            elif state == "comma":
+                if char == "]":
+                    return
+                if char != ",":
+                    raise ValueError("expected ',' or ']' at {}".format(pos))
+                pos, state = pos + 1, "value"
+            elif state == "first" and char == "]":
+                return
+            else:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                if not final and (end == len(buffer) or
+                                  buffer[end] not in _DELIMITERS):
+                    break
+                yield value
+                pos, state = end, "comma"
+    raise ValueError("truncated JSON array")
+
+
+def _close_response(future: Future) -> None:
+    """Close the response a finished, unused prefetch returned"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def iter_json_items(url: str, session: requests.Session = None,
+                    chunk_size: int = 65536,
+                    prefetch: bool = True) -> Iterator[Any]:
+    """Yield the elements of a paginated JSON array one at a time.
+    Each page is decoded incrementally as it downloads, following
+    `Link: rel="next"`, so memory stays bounded by one element and one
+    chunk whatever the size of the listing. With `prefetch`, the next
+    page is requested on a background thread as soon as the headers of
+    the current one arrive, while its body is being decoded.
+    """
+    if not prefetch:
+        while url is not None:
+            response = _get(url, session, stream=True)
+            try:
+                yield from iter_json_array(response.iter_content(chunk_size))
+                url = response.links.get("next", {}).get("url")
+            finally:
+                response.close()
+        return
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(_get, url, session, None, True)
+    try:
+        while future is not None:
+            response = future.result()
+            future = None
+            try:
+                url = response.links.get("next", {}).get("url")
+                if url is not None:
+                    future = executor.submit(_get, url, session, None, True)
+                yield from iter_json_array(response.iter_content(chunk_size))
+            finally:
+                response.close()
+    finally:
+        if future is not None and not future.cancel():
+            future.add_done_callback(_close_response)
+        executor.shutdown(wait=False)
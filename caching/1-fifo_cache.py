@@ -5,14 +5,30 @@
 So this code is apllying FIFO caching to the code and that is it
 """
 from base_caching import BaseCaching
+from cache_stats import CacheEvents
 
 
-class FIFOCache(BaseCaching):
+class FIFOCache(CacheEvents, BaseCaching):
     """ FIFO class """
 
     def __init__(self):
         super().__init__()
 
+    def discard(self):
+        """
+        the discard is for dropping the first item put and returning its key
+        """
+        first_key = next(iter(self.cache_data))
+        self.notify_discard(first_key)
+        del self.cache_data[first_key]
+        return first_key
+
+    def remove(self, key):
+        """
+        the remove is for dropping a key without counting it as evicted
+        """
+        self.cache_data.pop(key, None)
+
     def put(self, key, item):
         """
         the put is for adding item
@@ -22,10 +38,8 @@ class FIFOCache(BaseCaching):
         if key in self.cache_data:
             self.cache_data[key] = item
             return
-        if len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-            first_key = next(iter(self.cache_data))
-            print(f"DISCARD: {first_key}")
-            del self.cache_data[first_key]
+        if len(self.cache_data) >= self.MAX_ITEMS:
+            self.discard()
         self.cache_data[key] = item
 
     def get(self, key):
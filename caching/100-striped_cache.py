@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+"""100-striped_cache module."""
+
+from threading import Lock
+from base_caching import BaseCaching
+
+
+class StripedCache():
+    """Thread-safe cache spreading keys over independently locked segments.
+
+    Each segment is an instance of `policy` (any BaseCaching subclass)
+    guarded by its own lock, so threads working on keys that hash to
+    different segments never wait on each other. Eviction is applied by
+    the policy inside each segment.
+    """
+
+    def __init__(self, policy, segments=16, max_items=None):
+        """Build `segments` instances of `policy`.
+
+        When `max_items` is given it is split between segments, the first
+        `max_items % segments` of them holding one item more, so the cache
+        never holds more than `max_items`; it must be at least `segments`.
+        Otherwise every segment keeps the policy's own MAX_ITEMS.
+        """
+        if segments < 1:
+            raise ValueError("segments must be a positive integer")
+        if max_items is not None and max_items < segments:
+            raise ValueError("max_items must be at least segments")
+        self.segments = [policy() for _ in range(segments)]
+        self.locks = [Lock() for _ in range(segments)]
+        if max_items is not None:
+            per_segment, extra = divmod(max_items, segments)
+            for index, segment in enumerate(self.segments):
+                segment.MAX_ITEMS = per_segment + (index < extra)
+
+    def _index(self, key):
+        """Return the segment index owning `key`."""
+        return hash(key) % len(self.segments)
+
+    def put(self, key, item):
+        """Add an item in the cache."""
+        if key is None or item is None:
+            return
+        index = self._index(key)
+        with self.locks[index]:
+            self.segments[index].put(key, item)
+
+    def get(self, key):
+        """Retrieve an item by key."""
+        if key is None:
+            return None
+        index = self._index(key)
+        with self.locks[index]:
+            return self.segments[index].get(key)
+
+    def remove(self, key):
+        """Drop `key` from its segment, if cached."""
+        index = self._index(key)
+        with self.locks[index]:
+            self.segments[index].remove(key)
+
+    @property
+    def cache_data(self):
+        """Consistent-per-segment snapshot of every cached item."""
+        data = {}
+        for segment, lock in zip(self.segments, self.locks):
+            with lock:
+                data.update(segment.cache_data)
+        return data
+
+    print_cache = BaseCaching.print_cache
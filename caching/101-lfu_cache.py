@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""101-lfu_cache module."""
+
+from collections import OrderedDict
+from base_caching import BaseCaching
+from cache_stats import CacheEvents
+
+
+class LFUCache(CacheEvents, BaseCaching):
+    """LFU caching system.
+
+    Keys are grouped in per-frequency buckets kept in recency order, so
+    the victim (least frequently used, least recently used among ties)
+    is always the first key of the lowest bucket and every operation
+    is O(1).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frequency = {}
+        self.buckets = {}
+        self.min_frequency = 0
+
+    def _touch(self, key):
+        """Move `key` up to the next frequency bucket."""
+        count = self.frequency[key]
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_frequency == count:
+                self.min_frequency = count + 1
+        self.frequency[key] = count + 1
+        self.buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+    def discard(self):
+        """Evict the least frequently used item and return its key."""
+        if self.min_frequency not in self.buckets:
+            # the lowest bucket was emptied by remove()
+            self.min_frequency = min(self.buckets)
+        bucket = self.buckets[self.min_frequency]
+        lfu_key, _ = bucket.popitem(last=False)
+        if not bucket:
+            del self.buckets[self.min_frequency]
+        del self.frequency[lfu_key]
+        del self.cache_data[lfu_key]
+        self.notify_discard(lfu_key)
+        return lfu_key
+
+    def remove(self, key):
+        """Drop `key`, if cached, without counting it as an eviction.
+
+        An emptied lowest bucket is left for discard() to skip.
+        """
+        if key not in self.cache_data:
+            return
+        count = self.frequency.pop(key)
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+        del self.cache_data[key]
+
+    def put(self, key, item):
+        """Add an item in the cache."""
+        if key is None or item is None:
+            return
+
+        if key in self.cache_data:
+            self.cache_data[key] = item
+            self._touch(key)
+            return
+
+        if len(self.cache_data) >= self.MAX_ITEMS:
+            self.discard()
+
+        self.cache_data[key] = item
+        self.frequency[key] = 1
+        self.buckets.setdefault(1, OrderedDict())[key] = None
+        self.min_frequency = 1
+
+    def get(self, key):
+        """Retrieve an item by key."""
+        if key is None or key not in self.cache_data:
+            return None
+        self._touch(key)
+        return self.cache_data[key]
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+"""102-arc_cache module."""
+
+from collections import OrderedDict
+from base_caching import BaseCaching
+from cache_stats import CacheEvents
+
+
+class ARCCache(CacheEvents, BaseCaching):
+    """Adaptive Replacement Cache.
+
+    Cached keys are split between `recent` (seen once) and `frequent`
+    (seen at least twice). Two ghost lists remember keys recently
+    evicted from each side; a miss that hits a ghost list moves the
+    `target` size of `recent` towards the side that would have kept it.
+    A one-off scan therefore only churns `recent` and leaves the
+    frequently used working set in place.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.recent = OrderedDict()
+        self.frequent = OrderedDict()
+        self.recent_ghost = OrderedDict()
+        self.frequent_ghost = OrderedDict()
+        self.target = 0
+
+    def _replace(self, key):
+        """Evict one item from `recent` or `frequent` into its ghost list."""
+        if self.recent and (
+                not self.frequent or
+                len(self.recent) > self.target or
+                (key in self.frequent_ghost and
+                 len(self.recent) == self.target)):
+            old_key, _ = self.recent.popitem(last=False)
+            self.recent_ghost[old_key] = None
+        else:
+            old_key, _ = self.frequent.popitem(last=False)
+            self.frequent_ghost[old_key] = None
+        del self.cache_data[old_key]
+        self.notify_discard(old_key)
+        return old_key
+
+    def _promote(self, key):
+        """Record a hit on a cached key."""
+        if key in self.recent:
+            del self.recent[key]
+            self.frequent[key] = None
+        else:
+            self.frequent.move_to_end(key)
+
+    def discard(self):
+        """Evict one item chosen by the adaptive target and return its key.
+
+        Used when something other than MAX_ITEMS bounds the cache, so the
+        ghost lists are kept no longer than the cache itself.
+        """
+        old_key = self._replace(None)
+        limit = max(len(self.cache_data), 1)
+        for ghost in (self.recent_ghost, self.frequent_ghost):
+            while len(ghost) > limit:
+                ghost.popitem(last=False)
+        return old_key
+
+    def remove(self, key):
+        """Drop `key`, if cached, without counting it as an eviction.
+
+        The key is not remembered in a ghost list: a later miss on it
+        says nothing about which side should have kept it.
+        """
+        if key not in self.cache_data:
+            return
+        if key in self.recent:
+            del self.recent[key]
+        else:
+            del self.frequent[key]
+        del self.cache_data[key]
+
+    def put(self, key, item):
+        """Add an item in the cache."""
+        if key is None or item is None:
+            return
+
+        if key in self.cache_data:
+            self.cache_data[key] = item
+            self._promote(key)
+            return
+
+        capacity = self.MAX_ITEMS
+        full = len(self.cache_data) >= capacity
+        if key in self.recent_ghost:
+            step = max(len(self.frequent_ghost) // len(self.recent_ghost), 1)
+            self.target = min(capacity, self.target + step)
+            del self.recent_ghost[key]
+            if full:
+                self._replace(key)
+            self.frequent[key] = None
+        elif key in self.frequent_ghost:
+            step = max(len(self.recent_ghost) // len(self.frequent_ghost), 1)
+            self.target = max(0, self.target - step)
+            del self.frequent_ghost[key]
+            if full:
+                self._replace(key)
+            self.frequent[key] = None
+        else:
+            recent_side = len(self.recent) + len(self.recent_ghost)
+            if recent_side >= capacity:
+                if len(self.recent) < capacity:
+                    self.recent_ghost.popitem(last=False)
+                    if full:
+                        self._replace(key)
+                else:
+                    old_key, _ = self.recent.popitem(last=False)
+                    del self.cache_data[old_key]
+                    self.notify_discard(old_key)
+            else:
+                total = (recent_side + len(self.frequent) +
+                         len(self.frequent_ghost))
+                if total >= 2 * capacity and self.frequent_ghost:
+                    self.frequent_ghost.popitem(last=False)
+                if full:
+                    self._replace(key)
+            self.recent[key] = None
+
+        self.cache_data[key] = item
+
+    def get(self, key):
+        """Retrieve an item by key."""
+        if key is None or key not in self.cache_data:
+            return None
+        self._promote(key)
+        return self.cache_data[key]
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+"""103-ttl_cache module."""
+
+import heapq
+import threading
+import time
+from base_caching import BaseCaching
+from cache_stats import CacheEvents
+
+DEFAULT_TTL = object()
+
+
+class TTLCache(CacheEvents, BaseCaching):
+    """FIFO caching system whose entries can expire.
+
+    Every entry with a time-to-live gets a deadline pushed on a min-heap,
+    so an expiry pass only pops the deadlines that are due instead of
+    scanning cache_data. Expired entries are also dropped lazily by get.
+    `clock` returns the current time in seconds and can be swapped for a
+    fake one in tests.
+    """
+
+    def __init__(self, ttl=None, clock=time.monotonic):
+        """`ttl` is the default time-to-live; None means never expire."""
+        super().__init__()
+        self.ttl = ttl
+        self.clock = clock
+        self.deadlines = {}
+        self.heap = []
+        self.counter = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.sweeper = None
+
+    def _remove(self, key):
+        """Drop `key` and its deadline."""
+        del self.cache_data[key]
+        self.deadlines.pop(key, None)
+
+    def _expire(self, now):
+        """Pop every due deadline and drop the entries it still owns."""
+        expired = 0
+        while self.heap and self.heap[0][0] <= now:
+            deadline, order, key = heapq.heappop(self.heap)
+            if self.deadlines.get(key) == (deadline, order):
+                self._remove(key)
+                self.notify_expire(key)
+                expired += 1
+        return expired
+
+    def _schedule(self, key, ttl):
+        """Record the deadline of `key`, or clear it when `ttl` is None."""
+        if ttl is None:
+            self.deadlines.pop(key, None)
+            return
+        deadline = self.clock() + ttl
+        self.counter += 1
+        self.deadlines[key] = (deadline, self.counter)
+        heapq.heappush(self.heap, (deadline, self.counter, key))
+        if len(self.heap) > 2 * len(self.deadlines) + 64:
+            self.heap = [(deadline, order, key)
+                         for deadline, order, key in self.heap
+                         if self.deadlines.get(key) == (deadline, order)]
+            heapq.heapify(self.heap)
+
+    def _discard(self):
+        """Evict the first item put; the caller holds the lock."""
+        first_key = next(iter(self.cache_data))
+        self._remove(first_key)
+        self.notify_discard(first_key)
+        return first_key
+
+    def discard(self):
+        """Evict the first item put and return its key."""
+        with self.lock:
+            return self._discard()
+
+    def remove(self, key):
+        """Drop `key`, if cached, without counting it as an eviction.
+
+        Its heap entry goes stale and is skipped by the next expiry pass.
+        """
+        with self.lock:
+            if key in self.cache_data:
+                self._remove(key)
+
+    def put(self, key, item, ttl=DEFAULT_TTL):
+        """Add an item in the cache, expiring after `ttl` seconds.
+
+        Without `ttl` the cache default applies; None never expires.
+        """
+        if key is None or item is None:
+            return
+        if ttl is DEFAULT_TTL:
+            ttl = self.ttl
+
+        with self.lock:
+            if key not in self.cache_data and \
+                    len(self.cache_data) >= self.MAX_ITEMS:
+                self._expire(self.clock())
+                if len(self.cache_data) >= self.MAX_ITEMS:
+                    self._discard()
+            self.cache_data[key] = item
+            self._schedule(key, ttl)
+
+    def get(self, key):
+        """Retrieve an item by key, or None if it is missing or expired."""
+        if key is None:
+            return None
+        with self.lock:
+            if key not in self.cache_data:
+                return None
+            entry = self.deadlines.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                self._remove(key)
+                self.notify_expire(key)
+                return None
+            return self.cache_data[key]
+
+    def expire(self):
+        """Drop every expired entry and return how many were dropped."""
+        with self.lock:
+            return self._expire(self.clock())
+
+    def start_sweeper(self, interval=1.0):
+        """Run expire() every `interval` seconds on a daemon thread."""
+        if self.sweeper is not None:
+            return
+        self.stop_event.clear()
+
+        def sweep():
+            while not self.stop_event.wait(interval):
+                self.expire()
+
+        self.sweeper = threading.Thread(target=sweep, daemon=True)
+        self.sweeper.start()
+
+    def stop_sweeper(self):
+        """Stop the background sweeper started by start_sweeper."""
+        if self.sweeper is None:
+            return
+        self.stop_event.set()
+        self.sweeper.join()
+        self.sweeper = None
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+"""104-sized_cache module."""
+
+import json
+import sys
+from base_caching import BaseCaching
+
+
+def shallow_sizeof(item):
+    """Size of `item` itself, without what it references."""
+    return sys.getsizeof(item)
+
+
+def deep_sizeof(item):
+    """Size of `item` and every container, key and value it holds."""
+    seen = set()
+    stack = [item]
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return size
+
+
+def json_sizeof(item):
+    """Length in bytes of `item` serialized as JSON."""
+    return len(json.dumps(item).encode("utf-8"))
+
+
+class SizedCache():
+    """Cache bounded by a byte budget instead of an item count.
+
+    Eviction order is delegated to `policy`, any BaseCaching subclass
+    with a discard() method: victims are discarded one at a time until
+    the items fit in `max_bytes`. Item sizes come from `sizer`, e.g.
+    shallow_sizeof, deep_sizeof or json_sizeof. Entries the policy drops
+    by itself (e.g. TTLCache expiry) are uncounted through `on_expire`.
+    """
+
+    def __init__(self, policy, max_bytes, sizer=shallow_sizeof):
+        self.cache = policy()
+        self.cache.MAX_ITEMS = float("inf")
+        self.cache.on_expire = self._forget
+        self.max_bytes = max_bytes
+        self.sizer = sizer
+        self.sizes = {}
+        self.current_bytes = 0
+        self.peak_bytes = 0
+        self.evictions = 0
+
+    @property
+    def cache_data(self):
+        """Items held by the underlying policy."""
+        return self.cache.cache_data
+
+    def _forget(self, key):
+        """Stop counting an item the policy dropped by itself."""
+        self.current_bytes -= self.sizes.pop(key, 0)
+
+    def _discard(self):
+        """Evict one victim chosen by the policy."""
+        key = self.cache.discard()
+        self.current_bytes -= self.sizes.pop(key)
+        self.evictions += 1
+
+    def put(self, key, item, *args, **kwargs):
+        """Add an item in the cache, skipping items larger than the budget.
+
+        An oversized item still replaces what `key` held: the old value is
+        evicted rather than served stale. Extra arguments go to the
+        policy's put, e.g. a TTLCache ttl.
+        """
+        if key is None or item is None:
+            return
+        size = self.sizer(item)
+        if size > self.max_bytes:
+            if key in self.cache.cache_data:
+                self.remove(key)
+                self.evictions += 1
+            return
+
+        if key in self.cache.cache_data:
+            self.current_bytes += size - self.sizes[key]
+            self.sizes[key] = size
+            self.cache.put(key, item, *args, **kwargs)
+        else:
+            while self.sizes and self.current_bytes + size > self.max_bytes:
+                self._discard()
+            self.cache.put(key, item, *args, **kwargs)
+            self.sizes[key] = size
+            self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            self._discard()
+        self.peak_bytes = max(self.peak_bytes, self.current_bytes)
+
+    def get(self, key):
+        """Retrieve an item by key."""
+        return self.cache.get(key)
+
+    def remove(self, key):
+        """Drop `key` if it is cached and release its bytes."""
+        self.cache.remove(key)
+        self._forget(key)
+
+    print_cache = BaseCaching.print_cache
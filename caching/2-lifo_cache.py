@@ -1,15 +1,27 @@
 #!/usr/bin/python3
 """2-lifo_cache module."""
 
+from collections import OrderedDict
 from base_caching import BaseCaching
+from cache_stats import CacheEvents
 
 
-class LIFOCache(BaseCaching):
+class LIFOCache(CacheEvents, BaseCaching):
     """LIFO caching system."""
 
     def __init__(self):
         super().__init__()
-        self.keys_order = []
+        self.cache_data = OrderedDict()
+
+    def discard(self):
+        """Evict the last item put and return its key."""
+        last_key, _ = self.cache_data.popitem(last=True)
+        self.notify_discard(last_key)
+        return last_key
+
+    def remove(self, key):
+        """Drop `key` if it is cached."""
+        self.cache_data.pop(key, None)
 
     def put(self, key, item):
         """Add an item in the cache."""
@@ -18,17 +30,13 @@ class LIFOCache(BaseCaching):
 
         if key in self.cache_data:
             self.cache_data[key] = item
-            self.keys_order.remove(key)
-            self.keys_order.append(key)
+            self.cache_data.move_to_end(key)
             return
 
-        self.cache_data[key] = item
-        self.keys_order.append(key)
+        if len(self.cache_data) >= self.MAX_ITEMS:
+            self.discard()
 
-        if len(self.cache_data) > BaseCaching.MAX_ITEMS:
-            last_key = self.keys_order.pop(-2)
-            del self.cache_data[last_key]
-            print(f"DISCARD: {last_key}")
+        self.cache_data[key] = item
 
     def get(self, key):
         """Retrieve an item by key."""
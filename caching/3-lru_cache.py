@@ -1,15 +1,31 @@
 #!/usr/bin/python3
 """3-lru_cache module."""
 
+from collections import OrderedDict
 from base_caching import BaseCaching
+from cache_stats import CacheEvents
 
 
-class LRUCache(BaseCaching):
-    """LRU caching system."""
+class LRUCache(CacheEvents, BaseCaching):
+    """LRU caching system.
+
+    cache_data is kept in recency order (oldest first), so lookups,
+    refreshes and evictions are all O(1).
+    """
 
     def __init__(self):
         super().__init__()
-        self.keys_order = []
+        self.cache_data = OrderedDict()
+
+    def discard(self):
+        """Evict the least recently used item and return its key."""
+        lru_key, _ = self.cache_data.popitem(last=False)
+        self.notify_discard(lru_key)
+        return lru_key
+
+    def remove(self, key):
+        """Drop `key` if it is cached."""
+        self.cache_data.pop(key, None)
 
     def put(self, key, item):
         """Add an item in the cache."""
@@ -18,22 +34,17 @@ class LRUCache(BaseCaching):
 
         if key in self.cache_data:
             self.cache_data[key] = item
-            self.keys_order.remove(key)
-            self.keys_order.append(key)
+            self.cache_data.move_to_end(key)
             return
 
-        self.cache_data[key] = item
-        self.keys_order.append(key)
+        if len(self.cache_data) >= self.MAX_ITEMS:
+            self.discard()
 
-        if len(self.cache_data) > BaseCaching.MAX_ITEMS:
-            lru_key = self.keys_order.pop(0)
-            del self.cache_data[lru_key]
-            print(f"DISCARD: {lru_key}")
+        self.cache_data[key] = item
 
     def get(self, key):
         """Show an item by key."""
         if key is None or key not in self.cache_data:
             return None
-        self.keys_order.remove(key)
-        self.keys_order.append(key)
+        self.cache_data.move_to_end(key)
         return self.cache_data[key]
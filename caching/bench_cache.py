@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+"""bench_cache module.
+
+Micro-benchmarks for the caching policies. Run from this directory:
+
+    ./bench_cache.py latency
+    ./bench_cache.py threads
+    ./bench_cache.py zipf
+    ./bench_cache.py replay [trace_file] [capacity]
+
+A trace file holds one key per line; without one, a Zipf workload
+interleaved with sequential scans is generated and saved to scan.trace
+so the exact same run can be replayed later.
+"""
+import contextlib
+import os
+import random
+import sys
+import threading
+import time
+
+SIZES = (4, 100, 10000, 1000000)
+POLICIES = (
+    ("1-fifo_cache", "FIFOCache"),
+    ("2-lifo_cache", "LIFOCache"),
+    ("3-lru_cache", "LRUCache"),
+    ("4-mru_cache", "MRUCache"),
+    ("101-lfu_cache", "LFUCache"),
+    ("102-arc_cache", "ARCCache"),
+)
+SCAN_POLICIES = (
+    ("102-arc_cache", "ARCCache"),
+    ("3-lru_cache", "LRUCache"),
+    ("1-fifo_cache", "FIFOCache"),
+)
+
+
+def load_policy(module, name):
+    """Return the cache class `name` from the numbered `module`."""
+    return getattr(__import__(module), name)
+
+
+@contextlib.contextmanager
+def silenced():
+    """Swallow the DISCARD lines printed on eviction."""
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            yield
+
+
+def per_op_latency(cls, max_items, ops=200000):
+    """Return the mean ns per get/put on a full cache of `max_items`."""
+    cache = cls()
+    cache.MAX_ITEMS = max_items
+    with silenced():
+        for key in range(max_items):
+            cache.put(key, key)
+        start = time.perf_counter()
+        for i in range(ops):
+            key = max_items + i
+            cache.put(key, i)
+            cache.get(key - (max_items >> 1))
+        elapsed = time.perf_counter() - start
+    return elapsed / (2 * ops) * 1e9
+
+
+def latency(sizes=SIZES, policies=POLICIES):
+    """Print per-operation latency for each policy and capacity."""
+    print("{:<10}".format("policy") +
+          "".join("{:>12}".format(size) for size in sizes))
+    for module, name in policies:
+        cls = load_policy(module, name)
+        row = [per_op_latency(cls, size) for size in sizes]
+        print("{:<10}".format(name) +
+              "".join("{:>10.0f}ns".format(ns) for ns in row))
+
+
+def threaded_ops_per_sec(cache, threads, ops=50000, keyspace=4096):
+    """Return aggregate get/put ops/sec of `threads` workers on `cache`."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        keys = [rng.randrange(keyspace) for _ in range(ops)]
+        barrier.wait()
+        for key in keys:
+            if cache.get(key) is None:
+                cache.put(key, key)
+
+    workers = [threading.Thread(target=worker, args=(seed,))
+               for seed in range(threads)]
+    with silenced():
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    return threads * ops / elapsed
+
+
+def threads(counts=(1, 4, 16), segments=(1, 16), policies=POLICIES):
+    """Print StripedCache throughput per policy, thread and segment count."""
+    striped = load_policy("100-striped_cache", "StripedCache")
+    print("{:<10}{:>10}{:>10}{:>14}".format(
+        "policy", "threads", "segments", "ops/sec"))
+    for module, name in policies:
+        cls = load_policy(module, name)
+        for count in counts:
+            for segment_count in segments:
+                cache = striped(cls, segment_count, max_items=1024)
+                rate = threaded_ops_per_sec(cache, count)
+                print("{:<10}{:>10}{:>10}{:>14,.0f}".format(
+                    name, count, segment_count, rate))
+
+
+def zipf_trace(length, keyspace, skew=1.0, seed=0):
+    """Return `length` keys drawn from a Zipf(`skew`) distribution."""
+    weights = [1.0 / rank ** skew for rank in range(1, keyspace + 1)]
+    return random.Random(seed).choices(range(keyspace), weights, k=length)
+
+
+def replay_trace(cache, trace):
+    """Replay `trace` read-through against `cache`.
+
+    Return a (hit ratio, ops/sec) tuple.
+    """
+    hits = 0
+    with silenced():
+        start = time.perf_counter()
+        for key in trace:
+            if cache.get(key) is None:
+                cache.put(key, key)
+            else:
+                hits += 1
+        elapsed = time.perf_counter() - start
+    return hits / len(trace), len(trace) / elapsed
+
+
+def hit_ratio(cache, trace):
+    """Replay `trace` read-through against `cache`, return the hit ratio."""
+    return replay_trace(cache, trace)[0]
+
+
+def scan_trace(length, keyspace, scan_every=20000, scan_length=5000,
+               seed=0):
+    """Return a Zipf trace with a one-off sequential scan every so often."""
+    trace = []
+    next_scan_key = keyspace
+    for key in zipf_trace(length, keyspace, seed=seed):
+        trace.append(key)
+        if len(trace) % scan_every == 0:
+            trace.extend(range(next_scan_key, next_scan_key + scan_length))
+            next_scan_key += scan_length
+    return trace
+
+
+def read_trace(path):
+    """Load a trace file written by write_trace."""
+    with open(path) as trace_file:
+        return [line.rstrip("\n") for line in trace_file]
+
+
+def write_trace(path, trace):
+    """Save `trace` as one key per line."""
+    with open(path, "w") as trace_file:
+        trace_file.writelines("{}\n".format(key) for key in trace)
+
+
+def zipf(capacities=(16, 128, 1024), policies=POLICIES):
+    """Print hit ratios of each policy on a Zipf-distributed trace."""
+    trace = zipf_trace(200000, 20000)
+    print("{:<10}".format("policy") +
+          "".join("{:>10}".format(size) for size in capacities))
+    for module, name in policies:
+        cls = load_policy(module, name)
+        row = []
+        for capacity in capacities:
+            cache = cls()
+            cache.MAX_ITEMS = capacity
+            row.append(hit_ratio(cache, trace))
+        print("{:<10}".format(name) +
+              "".join("{:>10.2%}".format(ratio) for ratio in row))
+
+
+def replay(path=None, capacity=1024, policies=SCAN_POLICIES):
+    """Print hit ratio and ops/sec of each policy on a replayed trace."""
+    if path is None:
+        path = "scan.trace"
+        write_trace(path, scan_trace(200000, 20000))
+    trace = read_trace(path)
+    print("{} ({} keys, capacity {})".format(path, len(trace), capacity))
+    print("{:<10}{:>10}{:>14}".format("policy", "hit ratio", "ops/sec"))
+    for module, name in policies:
+        cache = load_policy(module, name)()
+        cache.MAX_ITEMS = capacity
+        ratio, rate = replay_trace(cache, trace)
+        print("{:<10}{:>10.2%}{:>14,.0f}".format(name, ratio, rate))
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "latency"
+    if command == "replay":
+        args = sys.argv[2:]
+        replay(args[0] if args else None,
+               int(args[1]) if len(args) > 1 else 1024)
+    else:
+        {"latency": latency, "threads": threads, "zipf": zipf}[command]()
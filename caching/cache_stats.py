@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+"""cache_stats module.
+
+Eviction hooks and opt-in statistics for the caching policies.
+Nothing here costs anything until instrument() is called on a cache:
+the counting wrappers are installed on that one instance only.
+"""
+import logging
+import time
+
+
+class CacheEvents():
+    """Mixin routing evictions to `on_discard` instead of stdout.
+
+    With no callback set, evictions keep printing "DISCARD: <key>".
+    Entries dropped because they expired are reported, silently, to
+    `on_expire`.
+    """
+
+    on_discard = None
+    on_expire = None
+
+    def notify_discard(self, key):
+        """Report that `key` was evicted."""
+        if self.on_discard is None:
+            print(f"DISCARD: {key}")
+        else:
+            self.on_discard(key)
+
+    def notify_expire(self, key):
+        """Report that `key` expired."""
+        if self.on_expire is not None:
+            self.on_expire(key)
+
+
+class CacheStats():
+    """Counters collected by instrument()."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.evictions = 0
+        self.latency = {}
+
+    @property
+    def hit_ratio(self):
+        """Share of get calls that found their key."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def record_latency(self, elapsed_ns):
+        """Count one call in the power-of-two latency bucket it falls in."""
+        bucket = 1 << elapsed_ns.bit_length()
+        self.latency[bucket] = self.latency.get(bucket, 0) + 1
+
+    def as_dict(self):
+        """Return the counters as a plain dict."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "puts": self.puts,
+            "evictions": self.evictions,
+            "hit_ratio": self.hit_ratio,
+            "latency_ns": dict(sorted(self.latency.items())),
+        }
+
+
+def instrument(cache, latency=False):
+    """Start collecting stats on `cache` and return its CacheStats.
+
+    get and put are wrapped on the instance; evictions are counted
+    through `on_discard` when the cache supports it, chaining to the
+    callback (or DISCARD print) already in place. With `latency` set,
+    every call is also timed into a histogram of nanoseconds.
+    """
+    stats = CacheStats()
+    get = cache.get
+    put = cache.put
+
+    if latency:
+        clock = time.perf_counter_ns
+
+        def counted_get(key):
+            start = clock()
+            item = get(key)
+            stats.record_latency(clock() - start)
+            if item is None:
+                stats.misses += 1
+            else:
+                stats.hits += 1
+            return item
+
+        def counted_put(key, item, *args, **kwargs):
+            start = clock()
+            put(key, item, *args, **kwargs)
+            stats.record_latency(clock() - start)
+            stats.puts += 1
+    else:
+        def counted_get(key):
+            item = get(key)
+            if item is None:
+                stats.misses += 1
+            else:
+                stats.hits += 1
+            return item
+
+        def counted_put(key, item, *args, **kwargs):
+            put(key, item, *args, **kwargs)
+            stats.puts += 1
+
+    cache.get = counted_get
+    cache.put = counted_put
+    if isinstance(cache, CacheEvents):
+        notify = cache.notify_discard
+
+        def counted_discard(key):
+            stats.evictions += 1
+            notify(key)
+
+        cache.notify_discard = counted_discard
+    cache.stats = stats
+    return stats
+
+
+def uninstrument(cache):
+    """Remove what instrument() installed on `cache`."""
+    for name in ("get", "put", "notify_discard", "stats"):
+        cache.__dict__.pop(name, None)
+
+
+def log_discards(cache, logger=None, level=logging.DEBUG):
+    """Send evictions of `cache` to `logger` instead of stdout."""
+    if logger is None:
+        logger = logging.getLogger("caching")
+    cache.on_discard = lambda key: logger.log(level, "DISCARD: %s", key)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Unit tests for 102-arc_cache.ARCCache.
+"""
+import random
+import unittest
+
+ARCCache = __import__('102-arc_cache').ARCCache
+
+
+class TestARCCache(unittest.TestCase):
+    """Test class for ARCCache."""
+
+    def make_cache(self, capacity):
+        """Build a quiet cache holding `capacity` items."""
+        cache = ARCCache()
+        cache.MAX_ITEMS = capacity
+        cache.on_discard = lambda key: None
+        return cache
+
+    def assert_invariants(self, cache, capacity):
+        """Check the list sizes ARC relies on."""
+        self.assertEqual(set(cache.recent) | set(cache.frequent),
+                         set(cache.cache_data))
+        self.assertEqual(len(cache.recent) + len(cache.frequent),
+                         len(cache.cache_data))
+        self.assertLessEqual(len(cache.cache_data), capacity)
+        self.assertLessEqual(len(cache.recent) + len(cache.recent_ghost),
+                             capacity)
+        self.assertLessEqual(len(cache.recent_ghost) +
+                             len(cache.frequent_ghost), capacity)
+        self.assertFalse(set(cache.recent_ghost) & set(cache.cache_data))
+        self.assertFalse(set(cache.frequent_ghost) & set(cache.cache_data))
+        self.assertTrue(0 <= cache.target <= capacity)
+
+    def test_invariants_under_random_load(self):
+        """Lists stay consistent and bounded over a mixed workload."""
+        rng = random.Random(7)
+        capacity = 8
+        cache = self.make_cache(capacity)
+        for _ in range(5000):
+            key = int(rng.paretovariate(1.2)) % 40
+            action = rng.random()
+            if action < 0.5:
+                cache.put(key, key)
+            elif action < 0.95:
+                item = cache.get(key)
+                self.assertIn(item, (None, key))
+            else:
+                cache.remove(key)
+            self.assert_invariants(cache, capacity)
+
+    def test_ghost_hits_move_target(self):
+        """A recent ghost hit grows target, a frequent ghost hit shrinks it."""
+        cache = self.make_cache(2)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.put("b", 2)
+        cache.put("c", 3)
+        self.assertEqual(list(cache.recent_ghost), ["b"])
+        self.assertEqual(cache.target, 0)
+
+        cache.put("b", 2)
+        self.assertEqual(cache.target, 1)
+        self.assertEqual(list(cache.frequent), ["b"])
+        self.assertEqual(list(cache.frequent_ghost), ["a"])
+
+        cache.put("a", 1)
+        self.assertEqual(cache.target, 0)
+        self.assertIn("a", cache.frequent)
+        self.assert_invariants(cache, 2)
+
+    def test_scan_keeps_hot_set(self):
+        """A one-off scan only churns recent and leaves frequent in place."""
+        cache = self.make_cache(8)
+        hot = ["hot{}".format(number) for number in range(4)]
+        for key in hot:
+            cache.put(key, key)
+            cache.get(key)
+        for number in range(100):
+            cache.put(number, number)
+        for key in hot:
+            self.assertEqual(cache.get(key), key)
+        self.assert_invariants(cache, 8)
+
+    def test_discard_trims_ghost_lists(self):
+        """discard keeps every ghost list no longer than the cache."""
+        cache = ARCCache()
+        cache.MAX_ITEMS = float("inf")
+        discarded = []
+        cache.on_discard = discarded.append
+        for key in range(10):
+            cache.put(key, key)
+        for key in range(5):
+            cache.get(key)
+        for _ in range(7):
+            cache.discard()
+        self.assertEqual(discarded[:5], [5, 6, 7, 8, 9])
+        self.assertEqual(len(cache.cache_data), 3)
+        self.assertLessEqual(len(cache.recent_ghost), 3)
+        self.assertLessEqual(len(cache.frequent_ghost), 3)
+        for _ in range(3):
+            cache.discard()
+        self.assertEqual(cache.cache_data, {})
+        self.assertLessEqual(len(cache.recent_ghost), 1)
+        self.assertLessEqual(len(cache.frequent_ghost), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for cache_stats: instrument, uninstrument and log_discards.
+"""
+import io
+import logging
+import unittest
+from contextlib import redirect_stdout
+
+from cache_stats import CacheStats, instrument, log_discards, uninstrument
+
+LRUCache = __import__('3-lru_cache').LRUCache
+TTLCache = __import__('103-ttl_cache').TTLCache
+
+
+class TestInstrument(unittest.TestCase):
+    """Test class for instrument and uninstrument."""
+
+    def setUp(self):
+        """Build an LRU cache whose evictions are recorded."""
+        self.cache = LRUCache()
+        self.discarded = []
+        self.cache.on_discard = self.discarded.append
+
+    def test_counts(self):
+        """Hits, misses, puts and evictions are counted."""
+        stats = instrument(self.cache)
+        for key in "abcde":
+            self.cache.put(key, key)
+        self.cache.get("a")
+        self.cache.get("b")
+        self.cache.get("e")
+        self.assertIs(self.cache.stats, stats)
+        self.assertEqual(stats.as_dict(), {
+            "hits": 2, "misses": 1, "puts": 5, "evictions": 1,
+            "hit_ratio": 2 / 3, "latency_ns": {}})
+        self.assertEqual(self.discarded, ["a"])
+
+    def test_put_arguments_are_forwarded(self):
+        """Extra put arguments, e.g. a TTLCache ttl, reach the policy."""
+        now = [0]
+        cache = TTLCache(ttl=10, clock=lambda: now[0])
+        stats = instrument(cache)
+        cache.put("a", 1, ttl=None)
+        now[0] = 20
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual((stats.puts, stats.hits), (1, 1))
+
+    def test_latency_buckets(self):
+        """Calls are timed into power-of-two nanosecond buckets."""
+        stats = CacheStats()
+        for elapsed_ns in (0, 1, 5, 7, 8, 1000):
+            stats.record_latency(elapsed_ns)
+        self.assertEqual(stats.latency, {1: 1, 2: 1, 8: 2, 16: 1, 1024: 1})
+
+        stats = instrument(self.cache, latency=True)
+        self.cache.put("a", 1)
+        self.cache.get("a")
+        self.cache.get("b")
+        self.assertEqual(sum(stats.latency.values()), 3)
+        for bucket in stats.latency:
+            self.assertEqual(bucket & (bucket - 1), 0)
+        self.assertEqual(list(stats.as_dict()["latency_ns"]),
+                         sorted(stats.latency))
+
+    def test_hit_ratio_without_lookups(self):
+        """The hit ratio is 0.0 before any get."""
+        self.assertEqual(instrument(self.cache).hit_ratio, 0.0)
+
+    def test_uninstrument_restores_class_methods(self):
+        """uninstrument removes the wrappers and the stats."""
+        stats = instrument(self.cache)
+        uninstrument(self.cache)
+        self.assertNotIn("get", vars(self.cache))
+        self.assertNotIn("notify_discard", vars(self.cache))
+        self.assertFalse(hasattr(self.cache, "stats"))
+        self.assertEqual(self.cache.get.__func__, LRUCache.get)
+        self.assertEqual(self.cache.put.__func__, LRUCache.put)
+        for key in "abcde":
+            self.cache.put(key, key)
+        self.cache.get("b")
+        self.assertEqual((stats.puts, stats.hits, stats.evictions),
+                         (0, 0, 0))
+        self.assertEqual(self.discarded, ["a"])
+
+
+class TestLogDiscards(unittest.TestCase):
+    """Test class for log_discards and the default DISCARD print."""
+
+    def fill(self, cache):
+        """Put one item more than the cache holds."""
+        for key in "abcde":
+            cache.put(key, key)
+
+    def test_prints_without_callback(self):
+        """With no on_discard, evictions keep printing DISCARD."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.fill(LRUCache())
+        self.assertEqual(output.getvalue(), "DISCARD: a\n")
+
+    def test_routes_evictions_to_logger(self):
+        """Evictions go to the given logger at the given level."""
+        cache = LRUCache()
+        logger = logging.getLogger("test_cache_stats")
+        log_discards(cache, logger, logging.INFO)
+        output = io.StringIO()
+        with self.assertLogs(logger, logging.INFO) as logs, \
+                redirect_stdout(output):
+            self.fill(cache)
+        self.assertEqual(logs.output, ["INFO:test_cache_stats:DISCARD: a"])
+        self.assertEqual(output.getvalue(), "")
+
+    def test_default_logger(self):
+        """Without a logger, evictions go to "caching" at DEBUG."""
+        cache = LRUCache()
+        log_discards(cache)
+        stats = instrument(cache)
+        with self.assertLogs("caching", logging.DEBUG) as logs:
+            self.fill(cache)
+        self.assertEqual(logs.output, ["DEBUG:caching:DISCARD: a"])
+        self.assertEqual(stats.evictions, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
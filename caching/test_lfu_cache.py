@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Unit tests for 101-lfu_cache.LFUCache.
+"""
+import unittest
+
+LFUCache = __import__('101-lfu_cache').LFUCache
+
+
+class TestLFUCache(unittest.TestCase):
+    """Test class for LFUCache."""
+
+    def setUp(self):
+        """Build a cache recording its evictions."""
+        self.cache = LFUCache()
+        self.discarded = []
+        self.cache.on_discard = self.discarded.append
+
+    def test_evicts_least_frequent(self):
+        """The key with the fewest uses goes first."""
+        for key in "abcd":
+            self.cache.put(key, key)
+        for key in "abd":
+            self.cache.get(key)
+        self.cache.put("e", "e")
+        self.assertEqual(self.discarded, ["c"])
+        self.assertEqual(self.cache.min_frequency, 1)
+
+    def test_lru_among_ties(self):
+        """Within one frequency the least recently used key goes first."""
+        for key in "abcd":
+            self.cache.put(key, key)
+        for key in "dcba":
+            self.cache.get(key)
+        self.cache.put("e", "e")
+        self.cache.put("f", "f")
+        self.assertEqual(self.discarded, ["d", "e"])
+
+    def test_put_existing_raises_frequency(self):
+        """Updating a key counts as a use and keeps its new item."""
+        for key in "abcd":
+            self.cache.put(key, key)
+        self.cache.put("a", "A")
+        self.assertEqual(self.cache.frequency["a"], 2)
+        self.cache.put("e", "e")
+        self.assertEqual(self.discarded, ["b"])
+        self.assertEqual(self.cache.get("a"), "A")
+        self.assertEqual(self.cache.frequency["a"], 3)
+
+    def test_discard_after_lowest_bucket_emptied(self):
+        """Once discard empties the lowest bucket the next one is found."""
+        for key in "abc":
+            self.cache.put(key, key)
+        self.cache.get("a")
+        self.cache.get("a")
+        self.cache.get("b")
+        self.assertEqual(self.cache.discard(), "c")
+        self.assertNotIn(1, self.cache.buckets)
+        self.assertEqual(self.cache.discard(), "b")
+        self.assertEqual(self.cache.discard(), "a")
+        self.assertEqual(self.cache.buckets, {})
+        self.assertEqual(self.cache.frequency, {})
+
+    def test_remove_empties_lowest_bucket(self):
+        """remove leaves no trace and discard skips its empty bucket."""
+        for key in "ab":
+            self.cache.put(key, key)
+        self.cache.get("b")
+        self.cache.remove("a")
+        self.cache.remove("a")
+        self.assertNotIn("a", self.cache.frequency)
+        self.assertEqual(self.cache.discard(), "b")
+        self.assertEqual(self.discarded, ["b"])
+        self.assertEqual(self.cache.cache_data, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Unit tests for 104-sized_cache.SizedCache.
+"""
+import unittest
+
+SizedCache = __import__('104-sized_cache').SizedCache
+LRUCache = __import__('3-lru_cache').LRUCache
+TTLCache = __import__('103-ttl_cache').TTLCache
+
+
+class TestSizedCache(unittest.TestCase):
+    """Test class for SizedCache."""
+
+    def test_evicts_to_fit_budget(self):
+        """Victims are discarded until the items fit in max_bytes."""
+        cache = SizedCache(LRUCache, max_bytes=10, sizer=len)
+        cache.cache.on_discard = lambda key: None
+        cache.put("a", "xxxx")
+        cache.put("b", "xxxx")
+        cache.get("a")
+        cache.put("c", "xxxx")
+        self.assertEqual(sorted(cache.cache_data), ["a", "c"])
+        self.assertEqual(cache.current_bytes, 8)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_oversized_put_evicts_old_value(self):
+        """An item over the budget drops the value its key held."""
+        cache = SizedCache(LRUCache, max_bytes=10, sizer=len)
+        cache.put("a", "xxxx")
+        cache.put("b", "xxxx")
+        cache.put("a", "x" * 20)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(list(cache.cache_data), ["b"])
+        self.assertEqual(cache.current_bytes, 4)
+        self.assertEqual(cache.evictions, 1)
+        cache.put("c", "x" * 20)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_ttl_is_forwarded_and_expiry_uncounted(self):
+        """put passes ttl to TTLCache and expired bytes are released."""
+        now = [0]
+        cache = SizedCache(lambda: TTLCache(clock=lambda: now[0]),
+                           max_bytes=10, sizer=len)
+        cache.put("short", "xxxx", ttl=1)
+        cache.put("long", "xxxx", ttl=None)
+        now[0] = 2
+        self.assertIsNone(cache.get("short"))
+        self.assertEqual(cache.current_bytes, 4)
+        cache.put("new", "xxxxxx")
+        self.assertEqual(sorted(cache.cache_data), ["long", "new"])
+        self.assertEqual(cache.evictions, 0)
+
+    def test_expire_releases_bytes(self):
+        """Entries dropped by TTLCache.expire are uncounted."""
+        now = [0]
+        cache = SizedCache(lambda: TTLCache(ttl=1, clock=lambda: now[0]),
+                           max_bytes=10, sizer=len)
+        cache.put("a", "xxxx")
+        now[0] = 2
+        self.assertEqual(cache.cache.expire(), 1)
+        self.assertEqual(cache.current_bytes, 0)
+        self.assertEqual(cache.sizes, {})
+
+    def test_remove_releases_bytes(self):
+        """remove drops the item through the policy and uncounts it."""
+        cache = SizedCache(LRUCache, max_bytes=10, sizer=len)
+        cache.put("a", "xxxx")
+        cache.put("b", "xxxx")
+        cache.remove("a")
+        cache.remove("missing")
+        self.assertEqual(list(cache.cache_data), ["b"])
+        self.assertEqual(cache.current_bytes, 4)
+        self.assertEqual(cache.sizes, {"b": 4})
+
+
+if __name__ == "__main__":
+    unittest.main()
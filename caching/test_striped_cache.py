@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for 100-striped_cache.StripedCache.
+"""
+import threading
+import unittest
+
+StripedCache = __import__('100-striped_cache').StripedCache
+LRUCache = __import__('3-lru_cache').LRUCache
+
+
+def quiet_lru():
+    """LRUCache whose evictions print nothing."""
+    cache = LRUCache()
+    cache.on_discard = lambda key: None
+    return cache
+
+
+class TestStripedCache(unittest.TestCase):
+    """Test class for StripedCache."""
+
+    def test_segment_sizing(self):
+        """max_items is split exactly, remainder on the first segments."""
+        cache = StripedCache(quiet_lru, segments=4, max_items=10)
+        self.assertEqual([segment.MAX_ITEMS for segment in cache.segments],
+                         [3, 3, 2, 2])
+        for key in range(100):
+            cache.put(key, key)
+        self.assertLessEqual(len(cache.cache_data), 10)
+
+    def test_default_sizing(self):
+        """Without max_items every segment keeps the policy's MAX_ITEMS."""
+        cache = StripedCache(quiet_lru, segments=3)
+        self.assertEqual([segment.MAX_ITEMS for segment in cache.segments],
+                         [LRUCache.MAX_ITEMS] * 3)
+
+    def test_rejects_bad_sizes(self):
+        """Segments must be positive and no more than max_items."""
+        with self.assertRaises(ValueError):
+            StripedCache(quiet_lru, segments=0)
+        with self.assertRaises(ValueError):
+            StripedCache(quiet_lru, segments=16, max_items=10)
+
+    def test_routes_keys_to_one_segment(self):
+        """put, get and remove go through the segment owning the key."""
+        cache = StripedCache(quiet_lru, segments=4, max_items=400)
+        cache.put("a", 1)
+        owner = cache.segments[cache._index("a")]
+        self.assertEqual(owner.cache_data, {"a": 1})
+        self.assertEqual(cache.get("a"), 1)
+        cache.remove("a")
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNone(cache.get(None))
+
+    def test_concurrent_put_get(self):
+        """Threads sharing the cache never see another key's item."""
+        cache = StripedCache(quiet_lru, segments=8, max_items=4096)
+        errors = []
+
+        def work(offset):
+            try:
+                for number in range(2000):
+                    key = (offset, number % 300)
+                    cache.put(key, key)
+                    item = cache.get(key)
+                    if item is not None and item != key:
+                        errors.append((key, item))
+            except Exception as error:
+                errors.append(error)
+
+        workers = [threading.Thread(target=work, args=(offset,))
+                   for offset in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(cache.cache_data), 4096)
+        for segment in cache.segments:
+            self.assertLessEqual(len(segment.cache_data), segment.MAX_ITEMS)
+
+
+if __name__ == "__main__":
+    unittest.main()
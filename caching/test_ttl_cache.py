@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Unit tests for 103-ttl_cache.TTLCache, driven by a fake clock.
+"""
+import unittest
+
+TTLCache = __import__('103-ttl_cache').TTLCache
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test class for TTLCache."""
+
+    def setUp(self):
+        """Build a cache with a 10 second default ttl on a fake clock."""
+        self.clock = FakeClock()
+        self.cache = TTLCache(ttl=10, clock=self.clock)
+        self.cache.on_discard = lambda key: None
+
+    def test_get_expires_lazily(self):
+        """get drops an entry once its deadline has passed."""
+        self.cache.put("a", 1)
+        self.clock.now = 9.9
+        self.assertEqual(self.cache.get("a"), 1)
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get("a"))
+        self.assertNotIn("a", self.cache.cache_data)
+        self.assertNotIn("a", self.cache.deadlines)
+
+    def test_per_item_ttl(self):
+        """An explicit ttl overrides the default."""
+        self.cache.put("short", 1, ttl=1)
+        self.cache.put("default", 2)
+        self.clock.now = 5
+        self.assertIsNone(self.cache.get("short"))
+        self.assertEqual(self.cache.get("default"), 2)
+
+    def test_none_ttl_never_expires(self):
+        """ttl=None stores an entry that outlives the default ttl."""
+        self.cache.put("forever", 1, ttl=None)
+        self.clock.now = 1e9
+        self.assertEqual(self.cache.get("forever"), 1)
+        self.assertEqual(self.cache.expire(), 0)
+
+    def test_put_refreshes_deadline(self):
+        """Putting a key again moves its deadline."""
+        self.cache.put("a", 1)
+        self.clock.now = 8
+        self.cache.put("a", 2)
+        self.clock.now = 15
+        self.assertEqual(self.cache.get("a"), 2)
+
+    def test_expire_pops_due_deadlines(self):
+        """expire drops only the due entries, through the heap."""
+        self.cache.put("a", 1, ttl=1)
+        self.cache.put("b", 2, ttl=2)
+        self.cache.put("c", 3, ttl=5)
+        self.clock.now = 2
+        self.assertEqual(self.cache.expire(), 2)
+        self.assertEqual(list(self.cache.cache_data), ["c"])
+        self.assertEqual([key for _, _, key in self.cache.heap], ["c"])
+
+    def test_expire_skips_stale_deadlines(self):
+        """A refreshed key is not dropped by its old deadline."""
+        self.cache.put("a", 1, ttl=1)
+        self.cache.put("a", 1, ttl=5)
+        self.clock.now = 2
+        self.assertEqual(self.cache.expire(), 0)
+        self.assertEqual(self.cache.get("a"), 1)
+
+    def test_full_cache_expires_before_discarding(self):
+        """A put into a full cache frees expired entries first."""
+        self.cache.put("old", 0, ttl=1)
+        for key in "abc":
+            self.cache.put(key, key)
+        self.clock.now = 2
+        self.cache.put("d", "d")
+        self.assertEqual(list(self.cache.cache_data), ["a", "b", "c", "d"])
+
+    def test_schedule_compacts_heap(self):
+        """Stale heap entries are compacted away on re-puts."""
+        for count in range(1000):
+            self.cache.put("a", count)
+        self.assertLessEqual(len(self.cache.heap), 2 * 1 + 64 + 1)
+        self.clock.now = 10
+        self.assertEqual(self.cache.expire(), 1)
+        self.assertEqual(self.cache.heap, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,15 +2,57 @@
 """
 Handles password encryption and validation.
 """
+import math
+import time
 import bcrypt
-from typing import Union
+from typing import Optional, Tuple, Union
 
 
-def hash_password(password: str) -> bytes:
+ROUNDS = 12
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+
+def calibrate_rounds(target_ms: float = 250.0) -> int:
+    """
+    Returns the highest cost whose hash fits in target_ms on this host,
+    clamped to MIN_ROUNDS..MAX_ROUNDS: a host too slow for even a
+    MIN_ROUNDS hash within target_ms still gets MIN_ROUNDS.
+    """
+    salt = bcrypt.gensalt(MIN_ROUNDS)
+    elapsed = []
+    for _ in range(3):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", salt)
+        elapsed.append((time.perf_counter() - start) * 1000)
+    # every extra round doubles the work
+    extra = math.floor(math.log2(target_ms / min(elapsed)))
+    return max(MIN_ROUNDS, min(MAX_ROUNDS, MIN_ROUNDS + extra))
+
+
+def set_rounds(rounds: Optional[int] = None,
+               target_ms: Optional[float] = None) -> int:
+    """
+    Installs the cost used by hash_password, needs_rehash and
+    verify_and_rehash when no rounds are given: either rounds, or
+    calibrate_rounds(target_ms). Returns the installed cost.
+    """
+    global ROUNDS
+    if rounds is None:
+        if target_ms is None:
+            raise ValueError("give rounds or target_ms")
+        rounds = calibrate_rounds(target_ms)
+    if not 4 <= rounds <= 31:
+        raise ValueError(f"bcrypt rounds must be within 4..31: {rounds}")
+    ROUNDS = rounds
+    return ROUNDS
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> bytes:
     """
     Hashes a password using a randomly generated salt.
     """
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds or ROUNDS)
     hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed_password
 
@@ -20,3 +62,34 @@ def is_valid(hashed_password: bytes, password: str) -> bool:
     Checks if a given password matches a hashed password.
     """
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+
+
+def get_rounds(hashed_password: Union[bytes, str]) -> int:
+    """
+    Returns the cost stored in a bcrypt hash ($2b$<rounds>$...).
+    """
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    return int(hashed_password.split(b'$')[2])
+
+
+def needs_rehash(hashed_password: bytes,
+                 rounds: Optional[int] = None) -> bool:
+    """
+    Tells whether a hash was made with another cost than the current one.
+    """
+    return get_rounds(hashed_password) != (rounds or ROUNDS)
+
+
+def verify_and_rehash(hashed_password: bytes, password: str,
+                      rounds: Optional[int] = None
+                      ) -> Tuple[bool, Optional[bytes]]:
+    """
+    Checks a password and, when valid but stale, returns a fresh hash
+    to store in place of the old one (None otherwise).
+    """
+    if not is_valid(hashed_password, password):
+        return False, None
+    if needs_rehash(hashed_password, rounds):
+        return True, hash_password(password, rounds)
+    return True, None
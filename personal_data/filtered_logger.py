@@ -2,11 +2,23 @@
 """
 filtered_logger.py
 """
+import argparse
+import atexit
+import copy
 import logging
 import os
+import queue
 import re
+import shutil
+import sys
+import threading
+import time
 import mysql.connector
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from typing import (Any, Dict, Iterable, Iterator, List, Optional, Pattern,
+                    Sequence, TextIO, Tuple)
 
 
 PII_FIELDS: Tuple[str, ...] = ("name", "email", "phone", "ssn", "password")
@@ -20,32 +32,192 @@ class RedactingFormatter(logging.Formatter):
     FORMAT = "[HOLBERTON] %(name)s %(levelname)s %(asctime)-15s: %(message)s"
     SEPARATOR = ";"
 
-    def __init__(self, fields: List[str]):
+    def __init__(self, fields: List[str], mode: str = "regex"):
+        """
+        mode is "regex" (filter_datum) or "tokenize" (tokenize_datum).
+        """
         super(RedactingFormatter, self).__init__(self.FORMAT)
+        if mode not in REDACTORS:
+            raise ValueError(f"unknown redaction mode: {mode}")
         self.fields = fields
+        self.mode = mode
+        self.redact = REDACTORS[mode]
+        self.redacted_fields = (frozenset(fields) if mode == "tokenize"
+                                else fields)
 
     def format(self, record: logging.LogRecord) -> str:
         """
         Formats a log record and redacts sensitive information.
         """
-        record.msg = filter_datum(self.fields, self.REDACTION,
-                                  record.getMessage(), self.SEPARATOR)
+        record.msg = self.redact(self.redacted_fields, self.REDACTION,
+                                 record.getMessage(), self.SEPARATOR)
         return super().format(record)
 
 
+def field_alternation(fields: Iterable[str]) -> str:
+    """
+    Builds a regex alternation of fields, factored into a trie so that a
+    long field list is matched one character at a time.
+    """
+    trie: Dict[str, Dict] = {}
+    for field in fields:
+        node = trie
+        for char in field:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Dict]) -> str:
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if "" in node else group
+
+    return build(trie)
+
+
+@lru_cache(maxsize=64)
+def redaction_engine(fields: Tuple[str, ...], redaction: str,
+                     separator: str) -> Tuple[Pattern, str]:
+    """
+    Returns the compiled pattern and replacement for a set of fields,
+    built once per (fields, redaction, separator).
+
+    The match starts at the "=" and the field name is checked by a
+    lookbehind (one per field length, as lookbehinds are fixed-width), so
+    the replacement is a plain string re can splice in without calling
+    back into Python for every match.
+    """
+    by_length: Dict[int, List[str]] = {}
+    for field in fields:
+        by_length.setdefault(len(field), []).append(field)
+    lookbehinds = "|".join(f"(?<={field_alternation(group)}=)"
+                           for _, group in sorted(by_length.items()))
+    pattern = re.compile(f"=(?:{lookbehinds}).*?{re.escape(separator)}")
+    replacement = f"={redaction}{separator}".replace("\\", "\\\\")
+    return pattern, replacement
+
+
 def filter_datum(fields: List[str], redaction: str, message: str,
                  separator: str) -> str:
     """
     Returns the log message obfuscated.
     """
-    pattern = f'({"|".join(fields)})=.*?{re.escape(separator)}'
-    return re.sub(pattern, lambda m: f'{m.group(1)}={redaction}{separator}',
-                  message)
+    pattern, replacement = redaction_engine(tuple(fields), redaction,
+                                            separator)
+    return pattern.sub(replacement, message)
 
 
-def get_logger() -> logging.Logger:
+def tokenize_datum(fields: Iterable[str], redaction: str, message: str,
+                   separator: str) -> str:
+    """
+    Returns the log message obfuscated, in one pass over its key=value
+    pairs. Keys must match a field exactly (so "username" is kept when
+    only "name" is redacted); a trailing pair with no separator is kept.
+    """
+    if not isinstance(fields, frozenset):
+        fields = frozenset(fields)
+    parts = message.split(separator)
+    for index in range(len(parts) - 1):
+        key, equals, _ = parts[index].partition("=")
+        if equals and key.lstrip() in fields:
+            parts[index] = f"{key}={redaction}"
+    return separator.join(parts)
+
+
+REDACTORS = {"regex": filter_datum, "tokenize": tokenize_datum}
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler over a bounded queue. When the queue is full, records are
+    dropped, or waited on up to timeout seconds when block is True.
+    Once stop has run, records are counted as dropped.
+    """
+
+    def __init__(self, log_queue: queue.Queue, block: bool = False,
+                 timeout: float = None):
+        super(BoundedQueueHandler, self).__init__(log_queue)
+        self.block = block
+        self.timeout = timeout
+        self.dropped = 0
+        self.stopped = False
+        self.listener = None
+        self.enqueue_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Freezes the message only; redaction and formatting are left to
+        the listener thread.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Queues a record, counting it as dropped when there is no room or
+        the listener is stopped.
+        """
+        with self.enqueue_lock:
+            if not self.stopped:
+                try:
+                    self.queue.put(record, self.block, self.timeout)
+                    return
+                except queue.Full:
+                    pass
+            self.dropped += 1
+
+    def stop(self) -> None:
+        """
+        Stops the listener once the queued records are written.
+        """
+        with self.enqueue_lock:
+            self.stopped = True
+        if self.listener is not None:
+            self.listener.stop()
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        Returns the queue depth and the number of dropped records.
+        """
+        return {"queue_depth": self.queue.qsize(),
+                "maxsize": self.queue.maxsize, "dropped": self.dropped}
+
+
+class DrainingQueueListener(QueueListener):
+    """
+    QueueListener whose stop waits for room in a full queue, so every
+    queued record is written before it returns, and can be called twice.
+    """
+
+    def enqueue_sentinel(self) -> None:
+        """
+        Queues the stop marker behind the pending records.
+        """
+        self.queue.put(self._sentinel)
+
+    def stop(self) -> None:
+        """
+        Writes out the pending records and stops the worker thread.
+        """
+        if self._thread is not None:
+            super(DrainingQueueListener, self).stop()
+
+
+def get_logger(queued: bool = False, maxsize: int = 10000,
+               block: bool = False) -> logging.Logger:
     """
     Creates and returns a configured logger.
+
+    With queued, records go through a BoundedQueueHandler of maxsize
+    records and are redacted and written by a listener thread, stopped
+    (and flushed) at exit by handler.stop; the handler keeps it as
+    handler.listener.
     """
     logger = logging.getLogger("user_data")
     logger.setLevel(logging.INFO)
@@ -53,7 +225,15 @@ def get_logger() -> logging.Logger:
     stream_handler = logging.StreamHandler()
     formatter = RedactingFormatter(list(PII_FIELDS))
     stream_handler.setFormatter(formatter)
-    logger.addHandler(stream_handler)
+    if not queued:
+        logger.addHandler(stream_handler)
+        return logger
+    queue_handler = BoundedQueueHandler(queue.Queue(maxsize), block)
+    queue_handler.listener = DrainingQueueListener(queue_handler.queue,
+                                                   stream_handler)
+    queue_handler.listener.start()
+    atexit.register(queue_handler.stop)
+    logger.addHandler(queue_handler)
     return logger
 
 
@@ -74,10 +254,220 @@ def get_db() -> mysql.connector.connection.MySQLConnection:
     )
 
 
-def main():
+def iter_batches(cursor, batch_size: int) -> Iterator[List[Tuple]]:
+    """
+    Yields the rows of an executed cursor, batch_size at a time.
+    """
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+def redact_batch(columns: Sequence[str], rows: List[Tuple],
+                 fields: Iterable[str] = PII_FIELDS) -> str:
+    """
+    Returns rows as the "key=value; ..." lines main() logs, redacted with
+    one filter_datum call for the whole batch.
+    """
+    row_format = "; ".join(
+        column.replace("{", "{{").replace("}", "}}") + "={}"
+        for column in columns)
+    text = "\n".join(row_format.format(*row) for row in rows)
+    return filter_datum(list(fields), RedactingFormatter.REDACTION, text,
+                        RedactingFormatter.SEPARATOR) + "\n"
+
+
+def report_progress(rows: int, elapsed: float) -> None:
+    """
+    Prints the exported row count and rate to stderr.
+    """
+    rate = rows / elapsed if elapsed else 0.0
+    print(f"{rows} rows exported, {rate:,.0f} rows/sec", file=sys.stderr)
+
+
+def export_rows(cursor, output: TextIO, batch_size: int = 1000,
+                progress_every: float = 5.0) -> int:
+    """
+    Writes the redacted rows of an executed cursor to output, one batch at
+    a time, reporting progress every progress_every seconds.
+    Returns the number of rows.
+    """
+    start = last_report = time.perf_counter()
+    count = 0
+    for rows in iter_batches(cursor, batch_size):
+        output.write(redact_batch(cursor.column_names, rows))
+        count += len(rows)
+        now = time.perf_counter()
+        if now - last_report >= progress_every:
+            report_progress(count, now - start)
+            last_report = now
+    report_progress(count, time.perf_counter() - start)
+    return count
+
+
+def export_query(output: TextIO, query: str, params: Tuple = (),
+                 batch_size: int = 1000) -> int:
+    """
+    Exports the rows of query, run on a new get_db connection, to output.
+    The default, unbuffered cursor reads rows from the server as they are
+    fetched, so memory stays bounded by one batch.
+    """
+    db = get_db()
+    cursor = db.cursor()
+    try:
+        cursor.execute(query, params)
+        count = export_rows(cursor, output, batch_size)
+    except BaseException:
+        # the rest of the result is unread: closing the cursor would raise
+        # "Unread result found" over this error, so drop the socket instead
+        db.shutdown()
+        raise
+    cursor.close()
+    db.close()
+    return count
+
+
+def export_users(output: TextIO, batch_size: int = 1000) -> int:
+    """
+    Streams the users table to output in bounded memory.
+    """
+    return export_query(output, "SELECT * FROM users;", (), batch_size)
+
+
+def quote_column(column: str) -> str:
+    """
+    Returns column as a quoted identifier, refusing anything but a name.
+    """
+    if not re.fullmatch(r"\w+", column):
+        raise ValueError(f"invalid column name: {column!r}")
+    return f"`{column}`"
+
+
+def shard_bounds(cursor, key: str, shards: int) -> List[Any]:
+    """
+    Returns up to shards - 1 values of key splitting users into ranges of
+    about the same number of rows. Any orderable column works: the
+    holberton users table has no numeric primary key.
+    """
+    column = quote_column(key)
+    cursor.execute(f"SELECT COUNT(*) FROM users WHERE {column} IS NOT NULL;")
+    (total,) = cursor.fetchone()
+    bounds: List[Any] = []
+    for index in range(1, shards):
+        cursor.execute(f"SELECT {column} FROM users WHERE {column} IS NOT NULL"
+                       f" ORDER BY {column} LIMIT 1 OFFSET %s;",
+                       (index * total // shards,))
+        row = cursor.fetchone()
+        if row is not None and (not bounds or row[0] > bounds[-1]):
+            bounds.append(row[0])
+    return bounds
+
+
+def shard_query(key: str, lower: Optional[Any],
+                upper: Optional[Any]) -> Tuple[str, Tuple]:
+    """
+    Returns the query and parameters selecting lower <= key < upper, in
+    key order. The first range also takes the rows whose key is NULL.
+    """
+    column = quote_column(key)
+    conditions, params = [], []
+    if lower is not None:
+        conditions.append(f"{column} >= %s")
+        params.append(lower)
+    if upper is not None:
+        conditions.append(f"{column} < %s")
+        params.append(upper)
+    where = " AND ".join(conditions)
+    if where and lower is None:
+        where = f"({where} OR {column} IS NULL)"
+    where = f" WHERE {where}" if where else ""
+    return (f"SELECT * FROM users{where} ORDER BY {column};",
+            tuple(params))
+
+
+def export_shard(path: str, key: str, lower: Optional[Any],
+                 upper: Optional[Any], batch_size: int = 1000) -> int:
+    """
+    Exports one key range to path over its own connection; runs in a
+    worker process. Returns the number of rows.
+    """
+    with open(path, "w", buffering=1 << 20) as output:
+        return export_query(output, *shard_query(key, lower, upper),
+                            batch_size)
+
+
+def export_users_sharded(path: str, shards: int, key: str = "email",
+                         batch_size: int = 1000, merge: bool = True) -> int:
+    """
+    Splits users into key ranges exported by up to shards processes, to
+    path.0, path.1, ... With merge, the parts are then concatenated into
+    path in key order and removed. Returns the number of rows.
+    """
+    db = get_db()
+    # buffered: the bound queries read one row each and run back to back
+    cursor = db.cursor(buffered=True)
+    try:
+        bounds = shard_bounds(cursor, key, shards)
+    finally:
+        cursor.close()
+        db.close()
+    ranges = list(zip([None] + bounds, bounds + [None]))
+    parts = [f"{path}.{index}" for index in range(len(ranges))]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        counts = list(executor.map(
+            export_shard, parts, [key] * len(ranges),
+            [lower for lower, _ in ranges], [upper for _, upper in ranges],
+            [batch_size] * len(ranges)))
+    if merge:
+        with open(path, "w", buffering=1 << 20) as output:
+            for part in parts:
+                with open(part) as shard_output:
+                    shutil.copyfileobj(shard_output, output, 1 << 20)
+                os.remove(part)
+    report_progress(sum(counts), time.perf_counter() - start)
+    return sum(counts)
+
+
+def main(argv: List[str] = None):
     """
     Main function to retrieve and log user data from the database.
+    With --export, the redacted rows are streamed to a file instead,
+    split across --shards processes when asked.
     """
+    parser = argparse.ArgumentParser(description="Log or export users.")
+    parser.add_argument("--export", metavar="FILE",
+                        help="write redacted rows to FILE ('-' for stdout)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--shards", type=int, default=1,
+                        help="export key ranges in this many processes")
+    parser.add_argument("--shard-key", default="email",
+                        help="orderable column the ranges are split on")
+    parser.add_argument("--per-shard", action="store_true",
+                        help="keep FILE.0, FILE.1, ... instead of merging")
+    args = parser.parse_args(argv)
+
+    if args.shards > 1:
+        if not args.export or args.export == "-":
+            parser.error("--shards needs --export FILE")
+        try:
+            quote_column(args.shard_key)
+        except ValueError as error:
+            parser.error(str(error))
+        export_users_sharded(args.export, args.shards, args.shard_key,
+                             args.batch_size, not args.per_shard)
+        return
+    if args.export == "-":
+        export_users(sys.stdout, args.batch_size)
+        return
+    if args.export:
+        with open(args.export, "w", buffering=1 << 20) as output:
+            export_users(output, args.batch_size)
+        return
+
     logger = get_logger()
     db = get_db()
     cursor = db.cursor(dictionary=True)
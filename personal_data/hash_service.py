@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Runs bcrypt hashing and verification on a bounded worker pool.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import Full
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from encrypt_password import hash_password, is_valid
+
+
+def _set_waiter(waiter: asyncio.Future) -> None:
+    """
+    Wakes a coroutine waiting for a slot, unless it gave up.
+    """
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class HashingService:
+    """
+    Bounded pool of bcrypt workers.
+
+    bcrypt releases the GIL while hashing, so a thread pool runs as many
+    hashes in parallel as it has workers. At most `max_pending` jobs are
+    accepted at once (queued or running); callers beyond that block, or
+    get queue.Full when `block` is False, instead of piling up.
+    Coroutines wait for a slot on their own event loop, without holding
+    a thread.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 64):
+        self.executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix="bcrypt")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.rejected = 0
+        self.latency = {}
+        self.waiters = deque()
+
+    def _run(self, operation: str, function: Callable, args: Tuple,
+             submitted: float):
+        """
+        Runs one job on a worker and records its timings.
+        """
+        started = time.perf_counter()
+        with self.lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return function(*args)
+        finally:
+            finished = time.perf_counter()
+            with self.lock:
+                self.running -= 1
+                stats = self.latency.setdefault(
+                    operation, {"count": 0, "wait": 0.0, "run": 0.0,
+                                "max": 0.0})
+                stats["count"] += 1
+                stats["wait"] += started - submitted
+                stats["run"] += finished - started
+                stats["max"] = max(stats["max"], finished - submitted)
+            self._release()
+
+    def _release(self) -> None:
+        """
+        Frees a slot and wakes the oldest coroutine waiting for one.
+        """
+        self.slots.release()
+        self._wake_next()
+
+    def _wake_next(self) -> None:
+        """
+        Wakes the oldest coroutine waiting for a slot, if any.
+        """
+        with self.lock:
+            if not self.waiters:
+                return
+            loop, waiter = self.waiters.popleft()
+        loop.call_soon_threadsafe(_set_waiter, waiter)
+
+    def _submit(self, operation: str, function: Callable, args: Tuple,
+                block: bool = True, timeout: float = None) -> Future:
+        """
+        Queues a job once a slot is free.
+        """
+        if not self.slots.acquire(block, timeout):
+            with self.lock:
+                self.rejected += 1
+            raise Full("too many pending bcrypt jobs")
+        return self._enqueue(operation, function, args)
+
+    def _enqueue(self, operation: str, function: Callable,
+                 args: Tuple) -> Future:
+        """
+        Hands a job to the pool; the caller already holds a slot.
+        """
+        with self.lock:
+            self.queued += 1
+        try:
+            future = self.executor.submit(self._run, operation, function,
+                                          args, time.perf_counter())
+        except BaseException:
+            with self.lock:
+                self.queued -= 1
+            self._release()
+            raise
+        future.add_done_callback(self._release_cancelled)
+        return future
+
+    def _release_cancelled(self, future: Future) -> None:
+        """
+        Frees the slot of a job cancelled before it started.
+        """
+        if future.cancelled():
+            with self.lock:
+                self.queued -= 1
+            self._release()
+
+    def submit_hash(self, password: str, block: bool = True,
+                    timeout: float = None) -> Future:
+        """
+        Schedules hash_password and returns its future.
+        """
+        return self._submit("hash", hash_password, (password,),
+                            block, timeout)
+
+    def submit_verify(self, hashed_password: bytes, password: str,
+                      block: bool = True, timeout: float = None) -> Future:
+        """
+        Schedules is_valid and returns its future.
+        """
+        return self._submit("verify", is_valid, (hashed_password, password),
+                            block, timeout)
+
+    def hash_many(self, passwords: Iterable[str]) -> List[bytes]:
+        """
+        Hashes every password in parallel, keeping their order.
+        """
+        futures = [self.submit_hash(password) for password in passwords]
+        return [future.result() for future in futures]
+
+    def verify_many(self, pairs: Iterable[Tuple[bytes, str]]) -> List[bool]:
+        """
+        Checks every (hashed_password, password) pair in parallel.
+        """
+        futures = [self.submit_verify(hashed_password, password)
+                   for hashed_password, password in pairs]
+        return [future.result() for future in futures]
+
+    async def _acquire_async(self) -> None:
+        """
+        Waits on the running loop until a slot is taken.
+        """
+        loop = asyncio.get_running_loop()
+        while not self.slots.acquire(blocking=False):
+            waiter = loop.create_future()
+            with self.lock:
+                self.waiters.append((loop, waiter))
+            # a slot may have been freed before the waiter was registered
+            if self.slots.acquire(blocking=False):
+                self._forget_waiter(loop, waiter)
+                return
+            try:
+                await waiter
+            except BaseException:
+                if not self._forget_waiter(loop, waiter):
+                    # woken but cancelled: pass the wake-up on
+                    self._wake_next()
+                raise
+
+    def _forget_waiter(self, loop, waiter) -> bool:
+        """
+        Removes a waiter still queued; False if it was already woken.
+        """
+        with self.lock:
+            try:
+                self.waiters.remove((loop, waiter))
+            except ValueError:
+                return False
+        return True
+
+    async def _submit_async(self, operation: str, function: Callable,
+                            args: Tuple, block: bool = True,
+                            timeout: float = None):
+        """
+        Awaits a job without blocking the event loop, even when full.
+        """
+        try:
+            if not block:
+                if not self.slots.acquire(blocking=False):
+                    raise asyncio.TimeoutError
+            elif timeout is None:
+                await self._acquire_async()
+            else:
+                await asyncio.wait_for(self._acquire_async(), timeout)
+        except asyncio.TimeoutError:
+            with self.lock:
+                self.rejected += 1
+            raise Full("too many pending bcrypt jobs") from None
+        future = self._enqueue(operation, function, args)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str, block: bool = True,
+                   timeout: float = None) -> bytes:
+        """
+        Hashes a password from a coroutine.
+        """
+        return await self._submit_async("hash", hash_password, (password,),
+                                        block, timeout)
+
+    async def verify(self, hashed_password: bytes, password: str,
+                     block: bool = True, timeout: float = None) -> bool:
+        """
+        Checks a password from a coroutine.
+        """
+        return await self._submit_async("verify", is_valid,
+                                        (hashed_password, password),
+                                        block, timeout)
+
+    def metrics(self) -> Dict:
+        """
+        Returns queue depth, running jobs, waiting coroutines, rejections
+        and latencies (ms).
+        """
+        with self.lock:
+            latency = {
+                operation: {
+                    "count": stats["count"],
+                    "mean_wait_ms": stats["wait"] / stats["count"] * 1000,
+                    "mean_run_ms": stats["run"] / stats["count"] * 1000,
+                    "max_ms": stats["max"] * 1000,
+                }
+                for operation, stats in self.latency.items()
+            }
+            return {"queue_depth": self.queued, "running": self.running,
+                    "waiting": len(self.waiters), "rejected": self.rejected,
+                    "latency": latency}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the workers once queued jobs are done.
+        """
+        self.executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "HashingService":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Unit tests for encrypt_password
+"""
+import unittest
+from unittest.mock import patch
+
+import encrypt_password
+from encrypt_password import (calibrate_rounds, get_rounds, hash_password,
+                              is_valid, needs_rehash, set_rounds,
+                              verify_and_rehash)
+
+
+class TestEncryptPassword(unittest.TestCase):
+    """
+    Tests run at bcrypt's lowest cost to stay fast.
+    """
+
+    def setUp(self):
+        """
+        Restores the module cost after each test.
+        """
+        self.addCleanup(setattr, encrypt_password, "ROUNDS",
+                        encrypt_password.ROUNDS)
+        set_rounds(4)
+
+    def test_hash_uses_installed_rounds(self):
+        """
+        hash_password follows set_rounds unless given rounds.
+        """
+        self.assertEqual(get_rounds(hash_password("pw")), 4)
+        self.assertEqual(get_rounds(hash_password("pw", rounds=5)), 5)
+        self.assertTrue(is_valid(hash_password("pw"), "pw"))
+        self.assertFalse(is_valid(hash_password("pw"), "other"))
+
+    def test_verify_and_rehash(self):
+        """
+        A valid password on a stale hash gets a hash at the current cost.
+        """
+        stale = hash_password("pw", rounds=5)
+        self.assertTrue(needs_rehash(stale))
+        self.assertEqual(verify_and_rehash(stale, "other"), (False, None))
+
+        valid, fresh = verify_and_rehash(stale, "pw")
+        self.assertTrue(valid)
+        self.assertEqual(get_rounds(fresh), 4)
+        self.assertTrue(is_valid(fresh, "pw"))
+        self.assertEqual(verify_and_rehash(fresh, "pw"), (True, None))
+
+    def test_set_rounds_calibrates(self):
+        """
+        set_rounds(target_ms=...) installs the calibrated cost.
+        """
+        with patch("encrypt_password.calibrate_rounds",
+                   return_value=11) as calibrate:
+            self.assertEqual(set_rounds(target_ms=100), 11)
+        calibrate.assert_called_once_with(100)
+        self.assertEqual(encrypt_password.ROUNDS, 11)
+        for rounds in (3, 32):
+            with self.assertRaises(ValueError):
+                set_rounds(rounds)
+        with self.assertRaises(ValueError):
+            set_rounds()
+
+    def test_calibrate_rounds(self):
+        """
+        Every extra round doubles the cost; the result is clamped.
+        """
+        cases = [(10.0, 40, 12), (10.0, 9.9, 10), (100.0, 50, 10),
+                 (1.0, 10 ** 6, 16)]
+        for hash_ms, target_ms, expected in cases:
+            ticks = []
+            for _ in range(3):
+                ticks.extend([0.0, hash_ms / 1000])
+            with patch("encrypt_password.bcrypt.hashpw"), \
+                    patch("encrypt_password.time.perf_counter",
+                          side_effect=ticks):
+                self.assertEqual(calibrate_rounds(target_ms), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,617 @@
+#!/usr/bin/env python3
+"""
+Unit tests for filtered_logger
+"""
+import copy
+import datetime
+import io
+import logging
+import os
+import queue
+import re
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from bench_redaction import legacy_filter_datum, make_messages
+from filtered_logger import (BoundedQueueHandler, DrainingQueueListener,
+                             PII_FIELDS, RedactingFormatter, export_rows,
+                             export_users, export_users_sharded,
+                             field_alternation, filter_datum, iter_batches,
+                             main, quote_column, redact_batch,
+                             redaction_engine, shard_bounds, shard_query,
+                             tokenize_datum)
+
+COLUMNS = ("name", "email", "phone", "ssn", "password", "ip", "last_login",
+           "user_agent")
+ROWS = [(f"user{number}", f"user{number}@example.com", "555-0100",
+         f"123-45-{number:04}", "$2b$12$abcdef", f"10.0.0.{number}",
+         datetime.datetime(2019, 11, 14, 6, 16, number % 60),
+         "Mozilla/5.0 {x}")
+        for number in range(25)]
+
+
+class UnreadResultError(Exception):
+    """
+    Stands in for mysql.connector's "Unread result found".
+    """
+
+
+class FakeCursor:
+    """
+    Unbuffered cursor over rows: closing it with rows left unread raises,
+    like mysql.connector. fail_after makes fetchmany fail after that many
+    rows.
+    """
+
+    def __init__(self, rows, columns=COLUMNS, fail_after=None):
+        self.rows = list(rows)
+        self.column_names = columns
+        self.fail_after = fail_after
+        self.position = 0
+        self.queries = []
+        self.closed = False
+
+    def execute(self, query, params=()):
+        self.queries.append((query, params))
+
+    def fetchmany(self, size):
+        if self.fail_after is not None and self.position >= self.fail_after:
+            raise ConnectionError("lost connection")
+        rows = self.rows[self.position:self.position + size]
+        self.position += len(rows)
+        return rows
+
+    def close(self):
+        if self.position < len(self.rows):
+            raise UnreadResultError("Unread result found")
+        self.closed = True
+
+
+class FakeDb:
+    """
+    Connection handing out one FakeCursor.
+    """
+
+    def __init__(self, cursor):
+        self.fake_cursor = cursor
+        self.closed = False
+        self.shut_down = False
+
+    def cursor(self):
+        return self.fake_cursor
+
+    def close(self):
+        if self.fake_cursor.position < len(self.fake_cursor.rows):
+            raise UnreadResultError("Unread result found")
+        self.closed = True
+
+    def shutdown(self):
+        self.shut_down = True
+
+
+class TestFilterDatum(unittest.TestCase):
+    """
+    Tests for filter_datum and the compiled redaction_engine.
+    """
+
+    def test_field_alternation(self):
+        """
+        The alternation matches exactly the given fields.
+        """
+        fields = ["name", "names", "email", "e", "password", "pass"]
+        pattern = re.compile(field_alternation(fields))
+        for field in fields:
+            self.assertTrue(pattern.fullmatch(field), field)
+        for other in ("nam", "namesake", "em", "passwor", ""):
+            self.assertIsNone(pattern.fullmatch(other), other)
+
+    def test_matches_legacy(self):
+        """
+        Output is the same as the original per-call regex.
+        """
+        messages = make_messages(50) + [
+            "username=bob;name=al;",
+            "name=a; username=b; ip=1;",
+            "name=;email=x@y;",
+            "password=a=b;ssn=1",
+            "ip=1;",
+        ]
+        for fields in (list(PII_FIELDS), ["name", "username"], ["name"],
+                       ["ip", "email"]):
+            for message in messages:
+                with self.subTest(fields=fields, message=message):
+                    self.assertEqual(
+                        filter_datum(fields, "xxx", message, ";"),
+                        legacy_filter_datum(fields, "xxx", message, ";"))
+
+    def test_metacharacters_in_fields(self):
+        """
+        Fields and separator are literal text, not patterns.
+        """
+        message = "a.b=1|axb=2|c++=3|cc=4|"
+        self.assertEqual(filter_datum(["a.b", "c++"], "***", message, "|"),
+                         "a.b=***|axb=2|c++=***|cc=4|")
+
+    def test_backslash_in_redaction(self):
+        """
+        The redaction is inserted as is, backslashes included.
+        """
+        self.assertEqual(filter_datum(["name"], "\\1\\g<0>", "name=bob;",
+                                      ";"),
+                         "name=\\1\\g<0>;")
+
+    def test_engine_is_cached(self):
+        """
+        A second call with the same fields reuses the compiled pattern.
+        """
+        redaction_engine.cache_clear()
+        filter_datum(["name", "email"], "***", "name=a;", ";")
+        filter_datum(["name", "email"], "***", "email=b;", ";")
+        info = redaction_engine.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        filter_datum(["email", "name"], "***", "name=a;", ";")
+        self.assertEqual(redaction_engine.cache_info().misses, 2)
+
+
+class TestTokenizeDatum(unittest.TestCase):
+    """
+    Tests for tokenize_datum and RedactingFormatter's redaction modes.
+    """
+
+    def test_exact_keys(self):
+        """
+        Only keys equal to a field are redacted.
+        """
+        self.assertEqual(
+            tokenize_datum(["name"], "***", "username=bob;name=al;", ";"),
+            "username=bob;name=***;")
+
+    def test_leading_space_keys(self):
+        """
+        Spaces before a key are kept and do not stop the match.
+        """
+        self.assertEqual(
+            tokenize_datum(["name", "email"], "***",
+                           "name=a; email=b;  ip=1;", ";"),
+            "name=***; email=***;  ip=1;")
+
+    def test_value_with_equals(self):
+        """
+        The key ends at the first "=": the rest is the value.
+        """
+        self.assertEqual(
+            tokenize_datum(["password"], "***", "password=a=b;ip=1;", ";"),
+            "password=***;ip=1;")
+        self.assertEqual(
+            tokenize_datum(["b"], "***", "a=b=c;", ";"), "a=b=c;")
+
+    def test_trailing_pair_is_kept(self):
+        """
+        A last pair with no separator is left alone, like filter_datum.
+        """
+        message = "name=a;email=b"
+        self.assertEqual(tokenize_datum(["name", "email"], "***", message,
+                                        ";"),
+                         "name=***;email=b")
+        self.assertEqual(filter_datum(["name", "email"], "***", message,
+                                      ";"),
+                         "name=***;email=b")
+
+    def test_formatter_modes(self):
+        """
+        The formatter redacts with the mode it was built with.
+        """
+        record = logging.LogRecord("user_data", logging.INFO, __file__, 0,
+                                   "username=bob;name=al;", None, None)
+        tokenize = RedactingFormatter(["name"], mode="tokenize")
+        regex = RedactingFormatter(["name"])
+        self.assertIs(tokenize.redact, tokenize_datum)
+        self.assertIs(regex.redact, filter_datum)
+        self.assertTrue(tokenize.format(copy.copy(record)).endswith(
+            "username=bob;name=***;"))
+        self.assertTrue(regex.format(copy.copy(record)).endswith(
+            "username=***;name=***;"))
+        with self.assertRaises(ValueError):
+            RedactingFormatter(["name"], mode="split")
+
+
+class ListHandler(logging.Handler):
+    """
+    Keeps formatted records, waiting on gate before each one.
+    """
+
+    def __init__(self, gate: threading.Event):
+        super(ListHandler, self).__init__()
+        self.gate = gate
+        self.lines = []
+        self.threads = set()
+        self.setFormatter(RedactingFormatter(list(PII_FIELDS)))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.gate.wait(5)
+        self.threads.add(threading.current_thread())
+        self.lines.append(self.format(record))
+
+
+class TestQueuedLogging(unittest.TestCase):
+    """
+    Tests for BoundedQueueHandler and DrainingQueueListener.
+    """
+
+    def make_logger(self, maxsize: int, block: bool = False):
+        """
+        Returns a logger writing through a bounded queue to a ListHandler.
+        """
+        self.gate = threading.Event()
+        self.target = ListHandler(self.gate)
+        self.handler = BoundedQueueHandler(queue.Queue(maxsize), block)
+        self.handler.listener = DrainingQueueListener(self.handler.queue,
+                                                      self.target)
+        self.handler.listener.start()
+        self.addCleanup(self.handler.stop)
+        self.addCleanup(self.gate.set)
+        logger = logging.getLogger(f"test_queued_{id(self)}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(self.handler)
+        self.addCleanup(logger.removeHandler, self.handler)
+        return logger
+
+    def test_redacts_on_listener_thread(self):
+        """
+        Records are redacted and written by the listener, not the caller.
+        """
+        logger = self.make_logger(10)
+        self.gate.set()
+        logger.info("name=%s; email=%s; ip=1;", "Bob", "bob@x.com")
+        self.handler.stop()
+
+        self.assertEqual(len(self.target.lines), 1)
+        self.assertTrue(self.target.lines[0].endswith(
+            "name=***; email=***; ip=1;"))
+        self.assertNotIn(threading.current_thread(), self.target.threads)
+
+    def test_drops_when_full(self):
+        """
+        Without block, records beyond the queue size are dropped and counted.
+        """
+        logger = self.make_logger(2)
+        for number in range(10):
+            logger.info("ip=%d;", number)
+        dropped = self.handler.metrics()["dropped"]
+        self.assertIn(dropped, (7, 8))
+        self.gate.set()
+        self.handler.stop()
+
+        self.assertEqual(len(self.target.lines), 10 - dropped)
+
+    def test_blocks_when_full(self):
+        """
+        With block, callers wait for room and nothing is dropped.
+        """
+        logger = self.make_logger(2, block=True)
+        writer = threading.Thread(
+            target=lambda: [logger.info("ip=%d;", number)
+                            for number in range(10)])
+        writer.start()
+        writer.join(0.1)
+        self.assertTrue(writer.is_alive())
+        self.gate.set()
+        writer.join(5)
+        self.handler.stop()
+
+        self.assertEqual(len(self.target.lines), 10)
+        self.assertEqual(self.handler.metrics()["dropped"], 0)
+
+    def test_stop_flushes_queue(self):
+        """
+        stop writes every queued record before returning.
+        """
+        logger = self.make_logger(1000)
+        for number in range(500):
+            logger.info("ip=%d;", number)
+        self.gate.set()
+        self.handler.stop()
+
+        self.assertEqual(len(self.target.lines), 500)
+        self.assertEqual(self.handler.metrics()["queue_depth"], 0)
+
+    def test_records_after_stop_are_dropped(self):
+        """
+        Once stopped, records are counted as dropped instead of queued.
+        """
+        logger = self.make_logger(10)
+        self.gate.set()
+        self.handler.stop()
+        logger.info("ip=1;")
+        self.handler.stop()
+
+        self.assertEqual(self.handler.metrics(),
+                         {"queue_depth": 0, "maxsize": 10, "dropped": 1})
+        self.assertEqual(self.target.lines, [])
+
+
+class TestExport(unittest.TestCase):
+    """
+    Tests for the batched export, against fake cursors.
+    """
+
+    @staticmethod
+    def per_row(rows):
+        """
+        Returns rows as main() logs them, one filter_datum call each.
+        """
+        return [filter_datum(list(PII_FIELDS), RedactingFormatter.REDACTION,
+                             "; ".join(f"{column}={value}"
+                                       for column, value in zip(COLUMNS, row)),
+                             RedactingFormatter.SEPARATOR)
+                for row in rows]
+
+    def test_iter_batches(self):
+        """
+        Rows come in batches of batch_size, the last one shorter.
+        """
+        batches = list(iter_batches(FakeCursor(ROWS), 10))
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual([row for batch in batches for row in batch], ROWS)
+        self.assertEqual(list(iter_batches(FakeCursor([]), 10)), [])
+
+    def test_redact_batch_matches_per_row(self):
+        """
+        One redaction over a batch gives the lines of per-row redaction.
+        """
+        lines = redact_batch(COLUMNS, ROWS).splitlines()
+        self.assertEqual(lines, self.per_row(ROWS))
+        self.assertTrue(lines[0].startswith("name=***; email=***;"))
+        self.assertTrue(lines[0].endswith("user_agent=Mozilla/5.0 {x}"))
+
+    def test_export_rows(self):
+        """
+        export_rows writes every row, whatever the batch size.
+        """
+        for batch_size in (1, 7, 100):
+            output = io.StringIO()
+            with patch("sys.stderr", io.StringIO()) as progress:
+                count = export_rows(FakeCursor(ROWS), output, batch_size)
+            self.assertEqual(count, 25)
+            self.assertEqual(output.getvalue().splitlines(),
+                             self.per_row(ROWS))
+            self.assertIn("25 rows exported", progress.getvalue())
+
+    def test_export_users(self):
+        """
+        export_users reads the users table and closes what it opened.
+        """
+        db = FakeDb(FakeCursor(ROWS))
+        output = io.StringIO()
+        with patch("filtered_logger.get_db", return_value=db), \
+                patch("sys.stderr", io.StringIO()):
+            self.assertEqual(export_users(output, 10), 25)
+        self.assertEqual(db.fake_cursor.queries,
+                         [("SELECT * FROM users;", ())])
+        self.assertTrue(db.fake_cursor.closed)
+        self.assertTrue(db.closed)
+
+    def test_export_failure_keeps_original_error(self):
+        """
+        A failure mid-export surfaces as itself, not as an unread result.
+        """
+        db = FakeDb(FakeCursor(ROWS, fail_after=10))
+        with patch("filtered_logger.get_db", return_value=db), \
+                patch("sys.stderr", io.StringIO()):
+            with self.assertRaises(ConnectionError):
+                export_users(io.StringIO(), 10)
+        self.assertTrue(db.shut_down)
+
+
+class SqliteCursor:
+    """
+    mysql.connector-like cursor over sqlite3 (%s placeholders).
+    """
+
+    def __init__(self, connection):
+        self.cursor = connection.cursor()
+
+    def execute(self, query, params=()):
+        self.cursor.execute(query.replace("%s", "?"), params)
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchmany(self, size):
+        return self.cursor.fetchmany(size)
+
+    @property
+    def column_names(self):
+        return tuple(column[0] for column in self.cursor.description)
+
+    def close(self):
+        self.cursor.close()
+
+
+class SqliteDb:
+    """
+    mysql.connector-like connection to a sqlite3 file.
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+
+    def cursor(self, buffered=False):
+        return SqliteCursor(self.connection)
+
+    def close(self):
+        self.connection.close()
+
+    shutdown = close
+
+
+class TestShardedExport(unittest.TestCase):
+    """
+    Tests for the key-range sharded export, on a sqlite users table.
+    """
+
+    def setUp(self):
+        """
+        Creates a users table, with NULL and repeated emails, and points
+        get_db at it.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.database = os.path.join(self.directory, "users.sqlite")
+        self.load_users(ROWS[:20] + [
+            ("nulled", None) + ROWS[0][2:],
+            ("other nulled", None) + ROWS[1][2:],
+        ] + [(f"dup{number}", "dup@example.com") + ROWS[0][2:]
+             for number in range(6)])
+        patcher = patch("filtered_logger.get_db",
+                        lambda: SqliteDb(self.database))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        stderr = patch("sys.stderr", io.StringIO())
+        stderr.start()
+        self.addCleanup(stderr.stop)
+
+    def load_users(self, rows):
+        """
+        Replaces the users table with rows.
+        """
+        connection = sqlite3.connect(self.database)
+        connection.execute("DROP TABLE IF EXISTS users")
+        connection.execute(f"CREATE TABLE users ({', '.join(COLUMNS)})")
+        connection.executemany(
+            f"INSERT INTO users VALUES ({', '.join('?' * len(COLUMNS))})",
+            [row[:6] + (str(row[6]),) + row[7:] for row in rows])
+        connection.commit()
+        connection.close()
+        self.count = len(rows)
+
+    def bounds(self, key, shards):
+        """
+        Returns shard_bounds over the test table.
+        """
+        db = SqliteDb(self.database)
+        try:
+            return shard_bounds(db.cursor(), key, shards)
+        finally:
+            db.close()
+
+    def single_export(self):
+        """
+        Returns the lines of an unsharded export.
+        """
+        output = io.StringIO()
+        export_users(output)
+        return output.getvalue().splitlines()
+
+    def test_quote_column(self):
+        """
+        Only plain column names are quoted; anything else is refused.
+        """
+        self.assertEqual(quote_column("email"), "`email`")
+        self.assertEqual(quote_column("last_login"), "`last_login`")
+        for column in ("id; DROP TABLE users", "a b", "`email`", "", "a.b"):
+            with self.assertRaises(ValueError):
+                quote_column(column)
+
+    def test_shard_query(self):
+        """
+        Ranges are half-open and the first one takes the NULL keys.
+        """
+        self.assertEqual(shard_query("email", None, None),
+                         ("SELECT * FROM users ORDER BY `email`;", ()))
+        self.assertEqual(
+            shard_query("email", None, "m"),
+            ("SELECT * FROM users WHERE (`email` < %s OR `email` IS NULL)"
+             " ORDER BY `email`;", ("m",)))
+        self.assertEqual(
+            shard_query("email", "c", "m"),
+            ("SELECT * FROM users WHERE `email` >= %s AND `email` < %s"
+             " ORDER BY `email`;", ("c", "m")))
+        self.assertEqual(
+            shard_query("email", "m", None),
+            ("SELECT * FROM users WHERE `email` >= %s ORDER BY `email`;",
+             ("m",)))
+        with self.assertRaises(ValueError):
+            shard_query("email`) OR (1", None, None)
+
+    def test_shard_bounds(self):
+        """
+        Bounds are increasing, without repeats, whatever the duplicates.
+        """
+        bounds = self.bounds("email", 4)
+        self.assertEqual(bounds, sorted(set(bounds)))
+        self.assertLessEqual(len(bounds), 3)
+        self.assertNotIn(None, bounds)
+        self.assertEqual(self.bounds("email", 1), [])
+
+    def test_shard_bounds_duplicates(self):
+        """
+        A key with a single value gives that value once, whatever the
+        shard count.
+        """
+        self.assertEqual(self.bounds("user_agent", 4), ["Mozilla/5.0 {x}"])
+
+    def test_shard_bounds_empty_table(self):
+        """
+        An empty table gives no bounds, and one empty shard.
+        """
+        self.load_users([])
+        self.assertEqual(self.bounds("email", 4), [])
+        path = os.path.join(self.directory, "empty.txt")
+        self.assertEqual(export_users_sharded(path, 4), 0)
+        with open(path) as output:
+            self.assertEqual(output.read(), "")
+
+    def test_sharded_export_matches_single(self):
+        """
+        The merged shards hold every row, NULL keys first, in key order.
+        """
+        path = os.path.join(self.directory, "users.txt")
+        self.assertEqual(export_users_sharded(path, 3), self.count)
+        with open(path) as output:
+            lines = output.read().splitlines()
+
+        self.assertEqual(sorted(lines), sorted(self.single_export()))
+        self.assertTrue(all(line.endswith("user_agent=Mozilla/5.0 {x}")
+                            for line in lines))
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ["users.sqlite", "users.txt"])
+
+    def test_per_shard_files(self):
+        """
+        Without merge, every range is left in its own file.
+        """
+        path = os.path.join(self.directory, "users.txt")
+        export_users_sharded(path, 3, key="name", merge=False)
+        parts = sorted(name for name in os.listdir(self.directory)
+                       if name.startswith("users.txt."))
+        self.assertEqual(parts, ["users.txt.0", "users.txt.1",
+                                 "users.txt.2"])
+        lines = []
+        for part in parts:
+            with open(os.path.join(self.directory, part)) as output:
+                lines.extend(output.read().splitlines())
+        self.assertEqual(sorted(lines), sorted(self.single_export()))
+
+    def test_main_rejects_shard_key(self):
+        """
+        A --shard-key that is not a column name stops main early.
+        """
+        path = os.path.join(self.directory, "users.txt")
+        with patch("filtered_logger.get_db") as get_db, \
+                patch("sys.stderr", io.StringIO()) as errors:
+            with self.assertRaises(SystemExit):
+                main(["--export", path, "--shards", "2",
+                      "--shard-key", "id; DROP TABLE users"])
+        get_db.assert_not_called()
+        self.assertIn("invalid column name", errors.getvalue())
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
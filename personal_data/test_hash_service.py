@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Unit tests for hash_service.HashingService
+"""
+import asyncio
+import threading
+import unittest
+from queue import Full
+from unittest.mock import patch
+
+from hash_service import HashingService
+
+
+class TestHashingService(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests with the bcrypt calls replaced by functions the test controls.
+    """
+
+    def setUp(self):
+        """
+        Makes hashing wait on self.release, verifying check a prefix.
+        """
+        self.release = threading.Event()
+
+        def fake_hash(password):
+            self.release.wait(5)
+            return b"hashed:" + password.encode()
+
+        def fake_verify(hashed_password, password):
+            return hashed_password == b"hashed:" + password.encode()
+
+        patchers = [patch("hash_service.hash_password", fake_hash),
+                    patch("hash_service.is_valid", fake_verify)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.service = HashingService(workers=1, max_pending=2)
+        self.addCleanup(self.service.shutdown)
+        self.addCleanup(self.release.set)
+
+    def assert_slots_free(self):
+        """
+        Checks that every slot can be taken again.
+        """
+        for _ in range(2):
+            self.assertTrue(self.service.slots.acquire(blocking=False))
+        self.assertFalse(self.service.slots.acquire(blocking=False))
+        for _ in range(2):
+            self.service.slots.release()
+
+    def test_hash_and_verify_many(self):
+        """
+        Results keep the order of the inputs.
+        """
+        self.release.set()
+        hashes = self.service.hash_many(["a", "b", "c"])
+        self.assertEqual(hashes, [b"hashed:a", b"hashed:b", b"hashed:c"])
+        self.assertEqual(self.service.verify_many(
+            [(hashes[0], "a"), (hashes[1], "x")]), [True, False])
+        metrics = self.service.metrics()
+        self.assertEqual(metrics["latency"]["hash"]["count"], 3)
+        self.assertEqual(metrics["latency"]["verify"]["count"], 2)
+
+    def test_full_queue_rejects(self):
+        """
+        Past max_pending, block=False raises Full and counts a rejection.
+        """
+        first = self.service.submit_hash("a")
+        self.service.submit_hash("b")
+        with self.assertRaises(Full):
+            self.service.submit_hash("c", block=False)
+        with self.assertRaises(Full):
+            self.service.submit_hash("c", timeout=0.01)
+        metrics = self.service.metrics()
+        self.assertEqual(metrics["rejected"], 2)
+        self.assertEqual(metrics["running"] + metrics["queue_depth"], 2)
+        self.release.set()
+        self.assertEqual(first.result(), b"hashed:a")
+
+    async def test_async_full_queue_rejects(self):
+        """
+        Coroutines get Full too, counted as rejections.
+        """
+        self.service.submit_hash("a")
+        self.service.submit_hash("b")
+        with self.assertRaises(Full):
+            await self.service.hash("c", block=False)
+        with self.assertRaises(Full):
+            await self.service.hash("c", timeout=0.01)
+        self.assertEqual(self.service.metrics()["rejected"], 2)
+        self.assertEqual(self.service.metrics()["waiting"], 0)
+
+    async def test_async_waits_for_slot(self):
+        """
+        A coroutine waits for a slot and gets its result once one frees.
+        """
+        self.service.submit_hash("a")
+        self.service.submit_hash("b")
+        task = asyncio.ensure_future(self.service.hash("c"))
+        await asyncio.sleep(0.05)
+        self.assertFalse(task.done())
+        self.assertEqual(self.service.metrics()["waiting"], 1)
+        self.release.set()
+        self.assertEqual(await asyncio.wait_for(task, 5), b"hashed:c")
+
+    async def test_async_waiters_hold_no_threads(self):
+        """
+        Waiting coroutines do not park threads.
+        """
+        self.service.submit_hash("a")
+        self.service.submit_hash("b")
+        threads = threading.active_count()
+        tasks = [asyncio.ensure_future(self.service.hash(str(number)))
+                 for number in range(20)]
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.service.metrics()["waiting"], 20)
+        self.assertLessEqual(threading.active_count(), threads)
+        self.release.set()
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+
+    async def test_cancelled_waiter_keeps_slots(self):
+        """
+        Cancelling a coroutine waiting for a slot leaks no slot.
+        """
+        self.service.submit_hash("a")
+        self.service.submit_hash("b")
+        task = asyncio.ensure_future(self.service.hash("c"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(self.service.metrics()["waiting"], 0)
+        self.release.set()
+        self.service.executor.shutdown(wait=True)
+        self.assert_slots_free()
+
+    async def test_cancelled_queued_job_frees_slot(self):
+        """
+        Cancelling a coroutine whose job has not started frees its slot.
+        """
+        self.service.submit_hash("a")
+        task = asyncio.ensure_future(self.service.hash("b"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.release.set()
+        self.service.executor.shutdown(wait=True)
+        self.assert_slots_free()
+        self.assertEqual(self.service.metrics()["queue_depth"], 0)
+
+    async def test_woken_then_cancelled_passes_slot_on(self):
+        """
+        A waiter cancelled right after being woken hands the wake-up on.
+        """
+        first = self.service.submit_hash("a")
+        self.service.submit_hash("b")
+        doomed = asyncio.ensure_future(self.service.hash("c"))
+        other = asyncio.ensure_future(self.service.hash("d"))
+        await asyncio.sleep(0.05)
+        self.service._wake_next()
+        doomed.cancel()
+        self.release.set()
+        first.result()
+        self.assertEqual(await asyncio.wait_for(other, 5), b"hashed:d")
+
+
+if __name__ == "__main__":
+    unittest.main()